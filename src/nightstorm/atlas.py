@@ -0,0 +1,96 @@
+"""Headless rendering of the color maps of theme variants into a PNG atlas."""
+
+import argparse
+from pathlib import Path
+import numpy as np
+import skia
+from nightstorm import vectorized
+from nightstorm.bulk_export import add_hex_argument, hex_accents
+from nightstorm.generate_themes import VARIANTS, compute_color_map
+
+LABEL_WIDTH = 240
+CELL_WIDTH = 96
+ROW_HEIGHT = 20
+PADDING = 2
+FONT_SIZE = 11
+BACKGROUND = skia.ColorSetRGB(0x20, 0x20, 0x20)
+LABEL_COLOR = skia.ColorSetRGB(0xbb, 0xbb, 0xbb)
+BASELINE = (ROW_HEIGHT + FONT_SIZE)//2 - 1  # of the text in a row
+LABEL_PAINT = skia.Paint(AntiAlias=True, Color=LABEL_COLOR)
+DARK_PAINT = skia.Paint(AntiAlias=True, Color=skia.ColorBLACK)
+LIGHT_PAINT = skia.Paint(AntiAlias=True, Color=skia.ColorWHITE)
+
+
+def color_matrix(variants) -> tuple[list[str], np.ndarray]:
+    """Return the color names and a names × variants array of colors in hex notation."""
+    color_maps = [compute_color_map(accent_color) for _, accent_color in variants]
+    names = list(color_maps[0])
+    return names, np.array([[color_map[name] for color_map in color_maps] for name in names])
+
+
+def to_argb(colors) -> np.ndarray:
+    """Convert colors in hex notation to skia's packed 0xAARRGGBB integers."""
+    packed = vectorized.hex_to_packed(colors)
+    return (packed >> 8) | (packed << 24)
+
+
+def draw_row(canvas, y, name, cells, font):
+    """Draw the label and swatches of a color, given (hex, argb, dark text) per variant."""
+    canvas.drawString(name.strip("$"), PADDING, y + BASELINE, font, LABEL_PAINT)
+    swatch_paint = skia.Paint()
+    for column, (color, argb, dark_text) in enumerate(cells):
+        x = LABEL_WIDTH + column*CELL_WIDTH
+        swatch_paint.setColor(argb)
+        canvas.drawRect(skia.Rect.MakeXYWH(x + PADDING, y + PADDING, CELL_WIDTH - 2*PADDING,
+                                           ROW_HEIGHT - 2*PADDING), swatch_paint)
+        canvas.drawString(color, x + 2*PADDING, y + BASELINE, font,
+                          DARK_PAINT if dark_text else LIGHT_PAINT)
+
+
+def record_atlas(variants) -> skia.Picture:
+    """Draw a table of swatches with a row per color and a column per variant."""
+    names, colors = color_matrix(variants)
+    argb = to_argb(colors).tolist()
+    # Dark text on light swatches, light text on dark ones.
+    dark_text = (vectorized.hex_to_lch(colors)[..., 0] > 0.65).tolist()
+    font = skia.Font(skia.Typeface("monospace"), FONT_SIZE)
+
+    recorder = skia.PictureRecorder()
+    canvas = recorder.beginRecording(LABEL_WIDTH + CELL_WIDTH*len(variants),
+                                     ROW_HEIGHT*(len(names) + 1))
+    canvas.clear(BACKGROUND)
+    for column, (variant_name, _) in enumerate(variants):
+        canvas.drawString(variant_name, LABEL_WIDTH + column*CELL_WIDTH + PADDING, BASELINE,
+                          font, LABEL_PAINT)
+    for row, name in enumerate(names):
+        draw_row(canvas, (row + 1)*ROW_HEIGHT, name,
+                 zip(colors[row].tolist(), argb[row], dark_text[row]), font)
+    return recorder.finishRecordingAsPicture()
+
+
+def render_atlas(variants=VARIANTS) -> bytes:
+    """Render the atlas of theme variants as PNG."""
+    picture = record_atlas(variants)
+    bounds = picture.cullRect()
+    surface = skia.Surface(int(bounds.width()), int(bounds.height()))
+    surface.getCanvas().drawPicture(picture)
+    return surface.makeImageSnapshot().encodeToData(skia.kPNG, 100).bytes()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "output",
+        nargs="?",
+        default=Path.cwd()/"atlas.png",
+        type=Path,
+        help="output file (default: %(default)s)",
+    )
+    add_hex_argument(parser, default=[])
+    args = parser.parse_args()
+    args.output.write_bytes(render_atlas([*VARIANTS, *hex_accents(args.hex)]))
+
+
+if __name__ == "__main__":
+    main()
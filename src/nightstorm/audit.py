@@ -0,0 +1,327 @@
+"""Contrast audit of themes.
+
+Foreground colors are paired with the backgrounds they are drawn on.
+Translucent backgrounds are composed over the editor background and
+translucent foregrounds over the composed background (like `opacify`),
+then WCAG 2 contrast ratios and APCA lightness contrasts are computed for
+the pairs of all audited themes at once.
+"""
+# pylint: disable=invalid-name
+
+import argparse
+import json
+import sys
+import zipfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+import numpy as np
+from nightstorm import jsonc, vectorized
+from nightstorm.color_manipulation import normalize_hex
+
+BASE_BACKGROUND = "editor.background"
+
+# (foreground, background) keys of text drawn on a background.
+PAIRS = (
+    ("foreground", "editor.background"),
+    ("editor.foreground", "editor.background"),
+    ("editorLineNumber.activeForeground", "editorGutter.background"),
+    ("editorWidget.foreground", "editorWidget.background"),
+    ("editorHoverWidget.foreground", "editorHoverWidget.background"),
+    ("editorSuggestWidget.foreground", "editorSuggestWidget.background"),
+    ("editorSuggestWidget.selectedForeground", "editorSuggestWidget.selectedBackground"),
+    ("editorInlayHint.foreground", "editorInlayHint.background"),
+    ("editor.inlineValuesForeground", "editor.inlineValuesBackground"),
+    ("activityBar.foreground", "activityBar.background"),
+    ("activityBarBadge.foreground", "activityBarBadge.background"),
+    ("badge.foreground", "badge.background"),
+    ("breadcrumb.foreground", "breadcrumb.background"),
+    ("breadcrumb.focusForeground", "breadcrumb.background"),
+    ("breadcrumb.activeSelectionForeground", "breadcrumb.background"),
+    ("button.foreground", "button.background"),
+    ("button.secondaryForeground", "button.secondaryBackground"),
+    ("checkbox.foreground", "checkbox.background"),
+    ("dropdown.foreground", "dropdown.background"),
+    ("input.foreground", "input.background"),
+    ("inputValidation.errorForeground", "inputValidation.errorBackground"),
+    ("inputValidation.infoForeground", "inputValidation.infoBackground"),
+    ("inputValidation.warningForeground", "inputValidation.warningBackground"),
+    ("keybindingLabel.foreground", "keybindingLabel.background"),
+    ("list.activeSelectionForeground", "list.activeSelectionBackground"),
+    ("list.focusForeground", "list.focusBackground"),
+    ("list.hoverForeground", "list.hoverBackground"),
+    ("list.inactiveSelectionForeground", "list.inactiveSelectionBackground"),
+    ("menu.foreground", "menu.background"),
+    ("menu.selectionForeground", "menu.selectionBackground"),
+    ("notifications.foreground", "notifications.background"),
+    ("notificationCenterHeader.foreground", "notificationCenterHeader.background"),
+    ("panelTitle.activeForeground", "panel.background"),
+    ("panelSectionHeader.foreground", "panelSectionHeader.background"),
+    ("peekViewResult.fileForeground", "peekViewResult.background"),
+    ("peekViewResult.lineForeground", "peekViewResult.background"),
+    ("peekViewResult.selectionForeground", "peekViewResult.selectionBackground"),
+    ("peekViewTitleLabel.foreground", "peekViewTitle.background"),
+    ("quickInput.foreground", "quickInput.background"),
+    ("quickInputList.focusForeground", "quickInputList.focusBackground"),
+    ("settings.headerForeground", "editor.background"),
+    ("sideBar.foreground", "sideBar.background"),
+    ("sideBarSectionHeader.foreground", "sideBarSectionHeader.background"),
+    ("sideBarTitle.foreground", "sideBarTitle.background"),
+    ("statusBar.foreground", "statusBar.background"),
+    ("statusBar.debuggingForeground", "statusBar.debuggingBackground"),
+    ("statusBar.noFolderForeground", "statusBar.noFolderBackground"),
+    ("statusBarItem.errorForeground", "statusBarItem.errorBackground"),
+    ("statusBarItem.warningForeground", "statusBarItem.warningBackground"),
+    ("statusBarItem.remoteForeground", "statusBarItem.remoteBackground"),
+    ("statusBarItem.prominentForeground", "statusBarItem.prominentBackground"),
+    ("tab.activeForeground", "tab.activeBackground"),
+    ("tab.selectedForeground", "tab.selectedBackground"),
+    ("terminal.foreground", "terminal.background"),
+    ("textLink.foreground", "editor.background"),
+    ("textLink.activeForeground", "editor.background"),
+    ("textPreformat.foreground", "textPreformat.background"),
+    ("titleBar.activeForeground", "titleBar.activeBackground"),
+)
+
+DEFAULT_MIN_WCAG = 4.5  # WCAG 2 AA for body text
+DEFAULT_MIN_APCA = 45.0  # APCA Lc for large and bold text
+
+# WCAG 2 relative luminance coefficients.
+_WCAG_COEFFICIENTS = np.array([0.2126, 0.7152, 0.0722])
+
+# APCA-W3 0.0.98G-4g constants.
+_APCA_COEFFICIENTS = np.array([0.2126729, 0.7151522, 0.0721750])
+_APCA_GAMMA = 2.4
+_APCA_BLACK_THRESHOLD = 0.022
+_APCA_BLACK_CLAMP = 1.414
+_APCA_DELTA_Y_MIN = 0.0005
+_APCA_LOW_CLIP = 0.1
+_APCA_OFFSET = 0.027
+_APCA_SCALE = 1.14
+
+
+class Pairs(NamedTuple):
+    """Foreground/background pairs of one or more themes."""
+    themes: list[str]
+    keys: list[str]  # foreground key (or token scope) per pair
+    foregrounds: list[str]
+    backgrounds: list[str]
+    bases: list[str]  # opaque color under a translucent background
+
+
+def theme_pairs(name: str, theme: dict) -> Pairs:
+    """Collect the foreground/background pairs of a theme.
+
+    Token colors are paired with the editor background. A background that
+    the theme does not define falls back to the editor background.
+    """
+    colors = theme.get("colors", {})
+    base = colors.get(BASE_BACKGROUND, "#000000")
+    pairs = Pairs([], [], [], [], [])
+
+    def add(key, foreground, background):
+        pairs.themes.append(name)
+        pairs.keys.append(key)
+        pairs.foregrounds.append(foreground)
+        pairs.backgrounds.append(background)
+        pairs.bases.append(base)
+
+    for foreground_key, background_key in PAIRS:
+        if colors.get(foreground_key):
+            add(foreground_key, colors[foreground_key], colors.get(background_key) or base)
+    for i, rule in enumerate(theme.get("tokenColors", [])):
+        foreground = rule.get("settings", {}).get("foreground")
+        if foreground:
+            scopes = rule.get("scope") or [str(i)]
+            scopes = [scopes] if isinstance(scopes, str) else scopes
+            label = rule.get("name") or scopes[0] + (", …" if len(scopes) > 1 else "")
+            add(f"tokenColors[{label}]", foreground, base)
+    return pairs
+
+
+def compose(foregrounds, backgrounds, bases) -> tuple[np.ndarray, np.ndarray]:
+    """Return the opaque sRGB coordinates of foregrounds and backgrounds as drawn."""
+    base_rgba = vectorized.hex_to_rgba(bases)
+    base_rgba[..., 3] = 1
+    background_rgba = vectorized.mix(vectorized.hex_to_rgba(backgrounds), base_rgba, 0,
+                                     mode="srgb", alpha_mode="blend")
+    foreground_rgba = vectorized.mix(vectorized.hex_to_rgba(foregrounds), background_rgba, 0,
+                                     mode="srgb", alpha_mode="blend")
+    return foreground_rgba[..., :3], background_rgba[..., :3]
+
+
+def wcag_contrast(foreground_rgb, background_rgb) -> np.ndarray:
+    """Return WCAG 2 contrast ratios of opaque sRGB coordinates."""
+    Y1 = vectorized.srgb_nonlinear_transform_inverse(foreground_rgb) @ _WCAG_COEFFICIENTS
+    Y2 = vectorized.srgb_nonlinear_transform_inverse(background_rgb) @ _WCAG_COEFFICIENTS
+    return (np.maximum(Y1, Y2) + 0.05)/(np.minimum(Y1, Y2) + 0.05)
+
+
+def _apca_luminance(rgb):
+    Y = np.clip(rgb, 0, 1)**_APCA_GAMMA @ _APCA_COEFFICIENTS
+    return np.where(Y < _APCA_BLACK_THRESHOLD,
+                    Y + np.abs(_APCA_BLACK_THRESHOLD - Y)**_APCA_BLACK_CLAMP, Y)
+
+
+def apca_contrast(foreground_rgb, background_rgb) -> np.ndarray:
+    """Return APCA lightness contrasts (Lc) of opaque sRGB text on backgrounds.
+
+    Dark text on light backgrounds has positive Lc, light text on dark
+    backgrounds negative Lc.
+    """
+    Y_text = _apca_luminance(foreground_rgb)
+    Y_background = _apca_luminance(background_rgb)
+    normal = (Y_background**0.56 - Y_text**0.57)*_APCA_SCALE
+    reverse = (Y_background**0.65 - Y_text**0.62)*_APCA_SCALE
+    Lc = np.where(Y_background > Y_text,
+                  np.where(normal < _APCA_LOW_CLIP, 0, normal - _APCA_OFFSET),
+                  np.where(reverse > -_APCA_LOW_CLIP, 0, reverse + _APCA_OFFSET))
+    return np.where(np.abs(Y_background - Y_text) < _APCA_DELTA_Y_MIN, 0, Lc*100)
+
+
+def collect_pairs(themes: Iterable[tuple[str, dict]]) -> tuple[list[str], Pairs]:
+    """Collect the pairs of named themes and return the names and the pairs."""
+    names = []
+    pairs = Pairs([], [], [], [], [])
+    for name, theme in themes:
+        names.append(name)
+        for field, values in zip(pairs, theme_pairs(name, theme)):
+            field.extend(values)
+    return names, pairs
+
+
+def valid_pairs(pairs: Pairs) -> tuple[Pairs, list[dict]]:
+    """Normalize the colors of pairs (e.g. #fff) and separate pairs with invalid colors."""
+    valid = Pairs([], [], [], [], [])
+    invalid = []
+    for theme, key, *colors in zip(*pairs):
+        try:
+            colors = [normalize_hex(color) for color in colors]
+        except ValueError as error:
+            invalid.append({"theme": theme, "key": key, "foreground": colors[0],
+                            "background": colors[1], "error": str(error)})
+            continue
+        for field, value in zip(valid, (theme, key, *colors)):
+            field.append(value)
+    return valid, invalid
+
+
+def contrast_failures(pairs: Pairs, min_wcag=DEFAULT_MIN_WCAG,
+                      min_apca=DEFAULT_MIN_APCA) -> list[dict]:
+    """Return the pairs (of valid colors) below a contrast threshold."""
+    if not pairs.keys:
+        return []
+    foreground_rgb, background_rgb = compose(pairs.foregrounds, pairs.backgrounds, pairs.bases)
+    wcag = wcag_contrast(foreground_rgb, background_rgb)
+    apca = apca_contrast(foreground_rgb, background_rgb)
+    return [{
+        "theme": pairs.themes[i],
+        "key": pairs.keys[i],
+        "foreground": pairs.foregrounds[i],
+        "background": pairs.backgrounds[i],
+        "wcag": round(float(wcag[i]), 2),
+        "apca": round(float(apca[i]), 1),
+    } for i in np.flatnonzero((wcag < min_wcag) | (np.abs(apca) < min_apca))]
+
+
+def audit(themes: Iterable[tuple[str, dict]], min_wcag=DEFAULT_MIN_WCAG,
+          min_apca=DEFAULT_MIN_APCA) -> dict[str, list[dict]]:
+    """Audit named themes and return the failing pairs per theme.
+
+    Pairs with an invalid color are reported with an error and not audited.
+    """
+    names, pairs = collect_pairs(themes)
+    pairs, invalid = valid_pairs(pairs)
+    failures = {name: [] for name in names}
+    for failure in [*invalid, *contrast_failures(pairs, min_wcag, min_apca)]:
+        failures[failure.pop("theme")].append(failure)
+    return failures
+
+
+def load_themes(paths: Iterable[Path]) -> Iterator[tuple[str, dict]]:
+    """Load themes from files, directories and zip archives (e.g. VSIX)."""
+    for path in paths:
+        if path.is_dir():
+            for theme_path in sorted(path.glob("Nightstorm-*.json")):
+                yield theme_path.stem, jsonc.loads(theme_path.read_text())
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for name in sorted(archive.namelist()):
+                    if Path(name).match("Nightstorm-*.json"):
+                        yield Path(name).stem, jsonc.loads(archive.read(name).decode())
+        else:
+            yield path.stem, jsonc.loads(path.read_text())
+
+
+def generated_themes(variants) -> Iterator[tuple[str, dict]]:
+    """Render theme variants in memory and parse them."""
+    # pylint: disable=import-outside-toplevel
+    from nightstorm.generate_themes import load_template, render_theme_variant
+    template = load_template()
+    for variant_name, accent_color in variants:
+        yield (f"Nightstorm-{variant_name}",
+               jsonc.loads(render_theme_variant(accent_color, variant_name, template)))
+
+
+def format_report(failures: dict[str, list[dict]]) -> str:
+    """Format failures per theme as text."""
+    lines = []
+    for name, theme_failures in failures.items():
+        lines.append(f"{name}: {len(theme_failures) or 'no'} failures")
+        for failure in theme_failures:
+            if "error" in failure:
+                lines.append(f"    {failure['key']:<48} {failure['error']}")
+                continue
+            lines.append(f"    {failure['key']:<48} {failure['foreground']:>9} on "
+                         f"{failure['background']:<9} WCAG {failure['wcag']:5.2f}"
+                         f"  APCA {failure['apca']:6.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=[Path.cwd()/"themes"],
+        type=Path,
+        help="theme files, directories or archives (default: themes)",
+    )
+    parser.add_argument(
+        "--generated",
+        action="store_true",
+        help="audit the variants rendered in memory instead of files",
+    )
+    parser.add_argument(
+        "--min-wcag",
+        default=DEFAULT_MIN_WCAG,
+        type=float,
+        help="minimum WCAG 2 contrast ratio (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--min-apca",
+        default=DEFAULT_MIN_APCA,
+        type=float,
+        help="minimum absolute APCA lightness contrast (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the failures as JSON",
+    )
+    args = parser.parse_args()
+
+    if args.generated:
+        from nightstorm.generate_themes import VARIANTS  # pylint: disable=import-outside-toplevel
+        themes = generated_themes(VARIANTS)
+    else:
+        themes = load_themes(args.paths)
+    failures = audit(themes, args.min_wcag, args.min_apca)
+    print(json.dumps(failures, indent=4) if args.json else format_report(failures))
+    if any(failures.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Benchmarks of the generation pipeline."""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from nightstorm import color_manipulation as cm
+from nightstorm import generate_themes
+
+DEFAULT_BASELINE = Path.cwd()/"benchmarks"/"baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+
+def _icon_render():
+    from nightstorm import generate_icon  # pylint: disable=import-outside-toplevel
+    generate_icon.encode_icon(generate_icon.record_icon())
+
+
+def _palette_construction():
+    generate_themes.get_base_chromatic_palette.cache_clear()
+    generate_themes.get_base_chromatic_palette()
+
+
+def _color_map():
+    generate_themes.get_color_graph.cache_clear()
+    generate_themes.compute_color_map(10)
+
+
+def _generate_theme_variant(output_dir):
+    generate_themes.get_color_graph.cache_clear()
+    generate_themes.generate_theme_variant(10, "blue", output_dir)
+
+
+def _template_loading():
+    generate_themes.load_template.cache_clear()
+    generate_themes.load_template()
+
+
+def benchmarks(output_dir: Path) -> dict:
+    """Return the benchmarks by name."""
+    rgba1 = cm.hex_to_rgba("#3074e2")
+    rgba2 = cm.hex_to_rgba("#cc808080")
+    lch = cm.hex_to_lch("#3074e2")
+    oklab = cm.linear_rgb_to_oklab(0.2, 0.4, 0.6)
+    return {
+        "hex_to_rgba": lambda: cm.hex_to_rgba("#3074e2"),
+        "rgba_to_hex": lambda: cm.rgba_to_hex(rgba1),
+        "srgb_nonlinear_transform": lambda: cm.srgb_nonlinear_transform(0.2),
+        "srgb_nonlinear_transform_inverse": lambda: cm.srgb_nonlinear_transform_inverse(0.2),
+        "linear_rgb_to_oklab": lambda: cm.linear_rgb_to_oklab(0.2, 0.4, 0.6),
+        "oklab_to_linear_rgb": lambda: cm.oklab_to_linear_rgb(*oklab),
+        "hex_to_lch": lambda: cm.hex_to_lch("#3074e2"),
+        "lch_to_hex": lambda: cm.lch_to_hex(*lch),
+        "oklab_adjust": lambda: cm.oklab_adjust("#3074e2", 0.85, 1.9),
+        "mix[oklab]": lambda: cm.mix(rgba1, rgba2, 0.3, "oklab"),
+        "mix[linear rgb]": lambda: cm.mix(rgba1, rgba2, 0.3, "linear rgb"),
+        "mix[srgb]": lambda: cm.mix(rgba1, rgba2, 0.3, "srgb"),
+        "mix[srgb 2.2]": lambda: cm.mix(rgba1, rgba2, 0.3, "srgb 2.2"),
+        "mix[oklab, blend]": lambda: cm.mix(rgba1, rgba2, 0.3, "oklab", "blend"),
+        "opacify": lambda: cm.opacify("#3074e280", "#202020"),
+        "deopacify": lambda: cm.deopacify("#ffffff", "#2c2c2c", "#a0a0a0"),
+        "palette_construction": _palette_construction,
+        "template_loading": _template_loading,
+        "color_map": _color_map,
+        "generate_theme_variant": lambda: _generate_theme_variant(output_dir),
+        "icon_render": _icon_render,
+    }
+
+
+def measure(function, repeat=5) -> float:
+    """Return the best time per call in seconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number))/number
+
+
+def run(names=None, repeat=5) -> dict[str, float]:
+    """Run benchmarks (with memoization disabled) and return the times per call."""
+    cm.set_cache_size(0)
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            suite = benchmarks(Path(output_dir))
+            results = {}
+            for name in names or suite:
+                results[name] = measure(suite[name], repeat)
+                print(f"{name:<36} {format_time(results[name]):>10}", file=sys.stderr)
+            return results
+    finally:
+        cm.set_cache_size()
+
+
+def compare(results: dict[str, float], baseline: dict[str, float],
+            threshold=DEFAULT_THRESHOLD) -> list[str]:
+    """Print a comparison with the baseline and return the regressed benchmarks."""
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f"{name:<36} {format_time(seconds):>10}   (no baseline)")
+            continue
+        ratio = seconds/baseline[name]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "improvement"
+        print(f"{name:<36} {format_time(baseline[name]):>10} -> {format_time(seconds):>10}"
+              f" {ratio:6.2f}x {flag}")
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    """Format a duration with a suitable unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds/scale:.3g} {unit}"
+    return f"{seconds/1e-9:.3g} ns"
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument(
+        "--save",
+        type=Path,
+        metavar="PATH",
+        help="save the results as a baseline",
+    )
+    compare_parser = subparsers.add_parser("compare", help="compare with a baseline")
+    compare_parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE,
+        type=Path,
+        help="baseline file (default: %(default)s)",
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        default=DEFAULT_THRESHOLD,
+        type=float,
+        help="relative slowdown flagged as a regression (default: %(default)s)",
+    )
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument(
+            "-k",
+            dest="names",
+            action="append",
+            metavar="NAME",
+            help="only run the given benchmark (repeatable)",
+        )
+        subparser.add_argument(
+            "--repeat",
+            default=5,
+            type=int,
+            help="timing repetitions, the best is kept (default: %(default)s)",
+        )
+    args = parser.parse_args()
+
+    results = run(args.names, args.repeat)
+    if args.command == "run":
+        if args.save:
+            args.save.parent.mkdir(parents=True, exist_ok=True)
+            args.save.write_text(json.dumps({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, indent=4) + "\n")
+        return
+    baseline = json.loads(args.baseline.read_text())["results"]
+    if compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
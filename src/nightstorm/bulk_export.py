@@ -0,0 +1,169 @@
+"""Bulk export of theme variants for arbitrary accent colors."""
+
+import argparse
+import itertools
+import math
+import re
+import zipfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from nightstorm.color_manipulation import hex_to_lch, lch_to_hex
+from nightstorm.generate_themes import (
+    get_base_chromatic_palette,
+    load_template,
+    render_theme_variant,
+    write_theme_variant,
+)
+
+ARCHIVE_SUFFIXES = (".zip", ".vsix")
+HEX_COLOR = re.compile(r"#?[0-9a-fA-F]{6}")
+
+
+def hex_color(value: str) -> str:
+    """Parse an rrggbb or #rrggbb argument into #rrggbb notation."""
+    if not HEX_COLOR.fullmatch(value):
+        raise argparse.ArgumentTypeError(f"invalid color {value!r} (expected #rrggbb)")
+    return "#" + value.removeprefix("#").lower()
+
+
+def hex_accents(colors: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """Name accent colors given in hex notation."""
+    for color in colors:
+        yield f"accent-{color.removeprefix('#').lower()}", color
+
+
+def add_hex_argument(parser, help_text="additional accent colors in #rrggbb notation",
+                     **kwargs):
+    """Add a `--hex` option of accent colors to a parser or argument group."""
+    parser.add_argument(
+        "--hex",
+        nargs="+",
+        type=hex_color,
+        metavar="COLOR",
+        help=help_text,
+        **kwargs,
+    )
+
+
+def lch_accents(coordinates: Iterable[tuple[float, float, float]]) \
+        -> Iterator[tuple[str, str]]:
+    """Name accent colors given as Oklab LCh-coordinates (hue in degrees)."""
+    for L, C, h in coordinates:  # pylint: disable=invalid-name
+        yield f"l{L:.3f}-c{C:.3f}-h{h:05.1f}", lch_to_hex(L, C, math.radians(h))
+
+
+def hue_grid(hues: Iterable[float], chromas: Iterable[float] | None = None,
+             lightness: float | None = None) -> Iterator[tuple[float, float, float]]:
+    """Return LCh-coordinates for a grid of hues (in degrees) × chromas.
+
+    Lightness and chroma default to those of the base chromatic palette.
+    """
+    base_lightness, base_chroma, _ = hex_to_lch(get_base_chromatic_palette()[0])
+    lightness = base_lightness if lightness is None else lightness
+    for h, C in itertools.product(hues, chromas or [base_chroma]):  # pylint: disable=invalid-name
+        yield lightness, C, h
+
+
+def frange(start: float, stop: float, step: float) -> Iterator[float]:
+    """Return evenly spaced values in the half-open interval [start, stop).
+
+    Raise ValueError if the step is not positive.
+    """
+    if step <= 0:
+        raise ValueError(f"step must be positive, not {step:g}")
+    return itertools.takewhile(lambda value: value < stop,
+                               (start + i*step for i in itertools.count()))
+
+
+def iter_themes(accents: Iterable[tuple[str, str]]) -> Iterator[tuple[str, str]]:
+    """Render a theme for each named accent color, one at a time."""
+    template = load_template()
+    palette = get_base_chromatic_palette()
+    for variant_name, accent_color in accents:
+        yield variant_name, render_theme_variant(accent_color, variant_name, template, palette)
+
+
+def write_directory(themes: Iterable[tuple[str, str]], output_dir: Path) -> int:
+    """Write rendered themes into a directory and return their number."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for variant_name, content in themes:
+        write_theme_variant(content, variant_name, output_dir)
+        count += 1
+    return count
+
+
+def write_archive(themes: Iterable[tuple[str, str]], path: Path,
+                  prefix: str = "extension/themes/") -> int:
+    """Write rendered themes into a zip archive and return their number.
+
+    The default prefix matches the layout of a VSIX package.
+    """
+    count = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for variant_name, content in themes:
+            archive.writestr(f"{prefix}Nightstorm-{variant_name}.json", content)
+            count += 1
+    return count
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "output",
+        type=Path,
+        help=f"output directory or archive ({', '.join(ARCHIVE_SUFFIXES)})",
+    )
+    accent_group = parser.add_mutually_exclusive_group(required=True)
+    add_hex_argument(accent_group, "accent colors in #rrggbb notation")
+    accent_group.add_argument(
+        "--lch",
+        nargs=3,
+        action="append",
+        type=float,
+        metavar=("L", "C", "H"),
+        help="accent color as Oklab LCh-coordinates, hue in degrees (repeatable)",
+    )
+    accent_group.add_argument(
+        "--hues",
+        nargs=3,
+        type=float,
+        metavar=("START", "STOP", "STEP"),
+        help="sweep accent hues in degrees",
+    )
+    parser.add_argument(
+        "--chromas",
+        nargs=3,
+        type=float,
+        metavar=("START", "STOP", "STEP"),
+        help="with --hues, sweep a grid of hues × chromas (default: palette chroma)",
+    )
+    parser.add_argument(
+        "--lightness",
+        type=float,
+        help="with --hues, accent lightness (default: palette lightness)",
+    )
+    args = parser.parse_args()
+
+    if args.hex:
+        accents = hex_accents(args.hex)
+    elif args.lch:
+        accents = lch_accents(args.lch)
+    else:
+        try:
+            chromas = frange(*args.chromas) if args.chromas else None
+            accents = lch_accents(hue_grid(frange(*args.hues), chromas, args.lightness))
+        except ValueError as error:
+            parser.error(f"argument --hues/--chromas: {error}")
+
+    themes = iter_themes(accents)
+    if args.output.suffix in ARCHIVE_SUFFIXES:
+        count = write_archive(themes, args.output)
+    else:
+        count = write_directory(themes, args.output)
+    print(f"{count} themes written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 """Color manipulation."""
 # pylint: disable=invalid-name
 
+import functools
 import math
+import re
+
+CACHE_SIZE = 4096
 
 
 def cbrt(x):  # python >= 3.11 has math.cbrt
@@ -75,10 +79,50 @@ def lch_to_lab(L, C, h):
     return L, a, b
 
 
+# Lookup tables for 8-bit channel values.
+SRGB_BY_BYTE = tuple(x/255 for x in range(256))
+LINEAR_BY_BYTE = tuple(map(srgb_nonlinear_transform_inverse, SRGB_BY_BYTE))
+_LINEAR_BY_SRGB = dict(zip(SRGB_BY_BYTE, LINEAR_BY_BYTE))
+
+
+def _srgb_to_linear(coordinates):
+    """Convert coordinates from sRGB to linear RGB (using the lookup table if possible)."""
+    return [_LINEAR_BY_SRGB.get(x) or srgb_nonlinear_transform_inverse(x) for x in coordinates]
+
+
+def _hex_to_bytes(s: str) -> tuple[int, int, int, int]:
+    value = int(f"{s[1:]:f<8}", 16)
+    return value >> 24, (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+_hex_to_bytes_cached = functools.lru_cache(maxsize=CACHE_SIZE)(_hex_to_bytes)
+
+
 def hex_to_rgba(s: str) -> list[float]:
     """Convert from #rrggbb[aa] notation to RGBA coordinates."""
-    return list(map(lambda x: int("".join(x), 16)/255,
-                    zip(*[iter(f"{s[1:]:f<8}")]*2)))
+    return [SRGB_BY_BYTE[x] for x in _hex_to_bytes_cached(s)]
+
+
+def hex_to_linear_rgb(s: str) -> tuple[float, float, float]:
+    """Convert from #rrggbb[aa] notation to linear RGB coordinates."""
+    r, g, b, _ = _hex_to_bytes_cached(s)
+    return LINEAR_BY_BYTE[r], LINEAR_BY_BYTE[g], LINEAR_BY_BYTE[b]
+
+
+_HEX_NOTATION = re.compile(r"#(?:[0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3,4})")
+
+
+def normalize_hex(s) -> str:
+    """Convert from #rgb[a] or #rrggbb[aa] notation (any case) to lowercase #rrggbb[aa].
+
+    Raise ValueError for anything else.
+    """
+    if not isinstance(s, str) or not _HEX_NOTATION.fullmatch(s):
+        raise ValueError(f"Invalid hex color {s!r}.")
+    digits = s[1:].lower()
+    if len(digits) <= 4:
+        digits = "".join(digit*2 for digit in digits)
+    return "#" + digits
 
 
 def rgba_to_hex(coordinates: list[float]) -> str:
@@ -88,8 +132,7 @@ def rgba_to_hex(coordinates: list[float]) -> str:
 
 def hex_to_lch(s):
     """Convert from hex notation to LCh-coordinates."""
-    *rgb, _ = hex_to_rgba(s)
-    return lab_to_lch(*linear_rgb_to_oklab(*map(srgb_nonlinear_transform_inverse, rgb)))
+    return lab_to_lch(*linear_rgb_to_oklab(*hex_to_linear_rgb(s)))
 
 
 def lch_to_hex(L, C, h):
@@ -98,29 +141,165 @@ def lch_to_hex(L, C, h):
                                 oklab_to_linear_rgb(*lch_to_lab(L, C, h)))))
 
 
-def oklab_adjust(base_color, lightness_factor=1, chroma_factor=1, hue_addend=0):
-    """Adjust lightness, chroma and/or hue."""
-    L, C, h = hex_to_lch(base_color)
-    L_adjusted = L * lightness_factor
-    C_adjusted = C * chroma_factor
-    h_adjusted = h + hue_addend
+class Color:
+    """A color in Oklab with alpha, kept in floating point.
+
+    `oklab_adjust`, `mix`, `opacify` and `deopacify` return a `Color` when
+    given one, so chains of adjustments are not quantized to 8 bits between
+    steps. Conversion to hex notation (`str`) happens once, at output.
+    """
+
+    __slots__ = ("_lab", "_alpha", "_linear_rgb", "_hex")
+
+    def __init__(self, L: float, a: float, b: float, alpha: float = 1.0):
+        self._lab = (L, a, b)
+        self._alpha = alpha
+        self._linear_rgb = None
+        self._hex = None
+
+    # The coordinates are read-only since colors are hashed by them (and
+    # memoized by `oklab_adjust`).
+    @property
+    def L(self) -> float:
+        """Lightness."""
+        return self._lab[0]
+
+    @property
+    def a(self) -> float:
+        """Green-red coordinate."""
+        return self._lab[1]
+
+    @property
+    def b(self) -> float:
+        """Blue-yellow coordinate."""
+        return self._lab[2]
+
+    @property
+    def alpha(self) -> float:
+        """Alpha."""
+        return self._alpha
+
+    @classmethod
+    def from_hex(cls, s: str) -> "Color":
+        """Create a color from #rrggbb[aa] notation."""
+        color = cls(*linear_rgb_to_oklab(*hex_to_linear_rgb(s)),
+                    SRGB_BY_BYTE[_hex_to_bytes_cached(s)[3]])
+        if len(s) == 7:
+            color._hex = s.lower()  # 8-bit colors survive the round trip
+        return color
+
+    @classmethod
+    def from_linear_rgb(cls, r: float, g: float, b: float, alpha: float = 1.0) -> "Color":
+        """Create a color from linear RGB coordinates."""
+        color = cls(*linear_rgb_to_oklab(r, g, b), alpha)
+        color._linear_rgb = (r, g, b)
+        return color
+
+    @classmethod
+    def from_rgba(cls, coordinates) -> "Color":
+        """Create a color from sRGB coordinates and alpha."""
+        *rgb, alpha = coordinates
+        return cls.from_linear_rgb(*_srgb_to_linear(rgb), alpha)
+
+    def lch(self) -> tuple[float, float, float]:
+        """Return the LCh-coordinates."""
+        return lab_to_lch(*self._lab)
+
+    def rgba(self) -> list[float]:
+        """Return the sRGB coordinates (clipped to the gamut) and alpha."""
+        linear_rgb = self._linear_rgb or oklab_to_linear_rgb(*self._lab)
+        return [*map(srgb_nonlinear_transform, linear_rgb), self.alpha]
+
+    def hex(self) -> str:
+        """Return the color in #rrggbb notation, or #rrggbbaa if translucent."""
+        if self._hex is None:
+            rgba = self.rgba()
+            self._hex = rgba_to_hex(rgba[:3] if round(self.alpha*255) == 255 else rgba)
+        return self._hex
+
+    __str__ = hex
+
+    def __repr__(self):
+        return f"Color({self.L!r}, {self.a!r}, {self.b!r}, {self.alpha!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Color):
+            return NotImplemented
+        return (self._lab, self._alpha) == (other._lab, other._alpha)
+
+    def __hash__(self):
+        return hash((self._lab, self._alpha))
+
+
+def _rgba(color) -> list[float]:
+    """Return the sRGB coordinates and alpha of a `Color`, hex notation or RGBA coordinates."""
+    if isinstance(color, Color):
+        return color.rgba()
+    return hex_to_rgba(color) if isinstance(color, str) else list(color)
+
+
+def oklab_adjust(base_color, lightness_factor=1, chroma_factor=1, hue_addend=0,
+                 gamut_mapping="clip"):
+    """Adjust lightness, chroma and/or hue (memoized, see `set_cache_size`).
+
+    The base color is in hex notation (the result is in #rrggbb notation)
+    or a `Color` (the result is a `Color` with the same alpha).
+    Out-of-gamut results are brought into sRGB either by clipping each
+    linear RGB channel ("clip") or by reducing chroma at constant lightness
+    and hue ("chroma", see `nightstorm.gamut`).
+    """
+    return _oklab_adjust_cached(base_color, lightness_factor, chroma_factor, hue_addend,
+                                gamut_mapping)
+
+
+def _oklab_adjust(base_color, lightness_factor, chroma_factor, hue_addend, gamut_mapping):
+    is_color = isinstance(base_color, Color)
+    L, C, h = base_color.lch() if is_color else hex_to_lch(base_color)
 
-    # Ensure lighness and chroma are non-negative.
-    L_adjusted = max(0, L_adjusted)
-    C_adjusted = max(0, C_adjusted)
+    # Adjust, ensuring lightness and chroma are non-negative.
+    lch = max(0, L * lightness_factor), max(0, C * chroma_factor), h + hue_addend
 
-    # Convert back to linear RGB.
-    L, a, b = lch_to_lab(L_adjusted, C_adjusted, h_adjusted)
-    r, g, b = oklab_to_linear_rgb(L, a, b)
+    if gamut_mapping == "chroma":
+        from nightstorm import gamut  # pylint: disable=import-outside-toplevel
+        lch = gamut.map_lch(*lch)
+    elif gamut_mapping != "clip":
+        raise ValueError("Invalid gamut mapping.")
 
-    # Clip to sRGB gamut.
-    r = clamp(r)
-    g = clamp(g)
-    b = clamp(b)
+    # Convert back to linear RGB and clip to sRGB gamut.
+    r, g, b = map(clamp, oklab_to_linear_rgb(*lch_to_lab(*lch)))
 
+    if is_color:
+        return Color.from_linear_rgb(r, g, b, base_color.alpha)
     return rgba_to_hex(list(map(srgb_nonlinear_transform, [r, g, b])))
 
 
+_oklab_adjust_cached = functools.lru_cache(maxsize=CACHE_SIZE)(_oklab_adjust)
+
+
+def set_cache_size(maxsize: int | None = CACHE_SIZE):
+    """Resize (and clear) the caches of hex parsing and Oklab adjustments.
+
+    A maxsize of None makes the caches unbounded and 0 disables them.
+    """
+    global _hex_to_bytes_cached, _oklab_adjust_cached  # pylint: disable=global-statement
+    _hex_to_bytes_cached = functools.lru_cache(maxsize=maxsize)(_hex_to_bytes)
+    _oklab_adjust_cached = functools.lru_cache(maxsize=maxsize)(_oklab_adjust)
+
+
+def cache_info() -> dict:
+    """Return hit/miss statistics of the caches."""
+    return {
+        "hex_parsing": _hex_to_bytes_cached.cache_info(),
+        "oklab_adjust": _oklab_adjust_cached.cache_info(),
+    }
+
+
+def cache_clear():
+    """Clear the caches and their statistics."""
+    _hex_to_bytes_cached.cache_clear()
+    _oklab_adjust_cached.cache_clear()
+
+
 def interpolate(c1, c2, t, gamma=1):
     """Interpolate color coordinates (with gamma correction)."""
     if isinstance(c1, (int, float)):
@@ -130,9 +309,16 @@ def interpolate(c1, c2, t, gamma=1):
 
 
 def mix(color1, color2, t, mode="oklab", alpha_mode="mix"):
-    """Mix colors in a perceptual color space or otherwise."""
+    """Mix colors in a perceptual color space or otherwise.
+
+    Colors are RGBA coordinates or `Color`s. The result is a `Color` if
+    either color is one, and RGBA coordinates otherwise.
+    """
     # https://stackoverflow.com/a/62238561
 
+    if isinstance(color1, Color) or isinstance(color2, Color):
+        return Color.from_rgba(mix(_rgba(color1), _rgba(color2), t, mode, alpha_mode))
+
     *rgb1, a1 = color1
     *rgb2, a2 = color2
 
@@ -147,13 +333,13 @@ def mix(color1, color2, t, mode="oklab", alpha_mode="mix"):
         gamma = (mode + " 1").split()[1]
         rgb = interpolate(rgb1, rgb2, t, gamma=float(gamma))
     elif mode == "linear rgb":
-        rgb1 = map(srgb_nonlinear_transform_inverse, rgb1)
-        rgb2 = map(srgb_nonlinear_transform_inverse, rgb2)
+        rgb1 = _srgb_to_linear(rgb1)
+        rgb2 = _srgb_to_linear(rgb2)
         rgb = interpolate(rgb1, rgb2, t)
         rgb = list(map(srgb_nonlinear_transform, rgb))
     elif mode == "oklab":
-        rgb1 = map(srgb_nonlinear_transform_inverse, rgb1)
-        rgb2 = map(srgb_nonlinear_transform_inverse, rgb2)
+        rgb1 = _srgb_to_linear(rgb1)
+        rgb2 = _srgb_to_linear(rgb2)
         rgb1 = linear_rgb_to_oklab(*rgb1)
         rgb2 = linear_rgb_to_oklab(*rgb2)
         rgb = interpolate(rgb1, rgb2, t)
@@ -166,18 +352,18 @@ def mix(color1, color2, t, mode="oklab", alpha_mode="mix"):
 
 
 def opacify(color, background="#FFFFFF"):
-    """Remove transparency."""
-    return rgba_to_hex(mix(hex_to_rgba(color),
-                           hex_to_rgba(background),
-                           t=0,
-                           mode="srgb",
-                           alpha_mode="blend"))[:7]
+    """Remove transparency (of a color in hex notation or a `Color`)."""
+    rgba = mix(_rgba(color), _rgba(background), t=0, mode="srgb", alpha_mode="blend")
+    if isinstance(color, Color):
+        return Color.from_rgba(rgba[:3] + [1.0])
+    return rgba_to_hex(rgba)[:7]
 
 
-def deopacify(color: str, background: str, target: str, alpha_tol: float = 0.02) -> str:
+def deopacify(color, background, target, alpha_tol: float = 0.02):
     """
     Calculate the alpha value for `color` such that blending it with `background`
-    results in `target`. Returns the color with the calculated alpha.
+    results in `target`. Returns the color with the calculated alpha (in hex
+    notation, or a `Color` if `color` is one).
 
     Raises:
         ValueError: If the target color cannot be achieved with the given color and background.
@@ -185,9 +371,9 @@ def deopacify(color: str, background: str, target: str, alpha_tol: float = 0.02)
     # By DeepSeek (深度求索).
 
     # Convert hex colors to RGB tuples
-    color_rgb = hex_to_rgba(color)[:3]
-    background_rgb = hex_to_rgba(background)[:3]
-    target_rgb = hex_to_rgba(target)[:3]
+    color_rgb = _rgba(color)[:3]
+    background_rgb = _rgba(background)[:3]
+    target_rgb = _rgba(target)[:3]
 
     # If color and background are the same, target must also match
     if color_rgb == background_rgb != target_rgb:
@@ -211,4 +397,6 @@ def deopacify(color: str, background: str, target: str, alpha_tol: float = 0.02)
     alpha_mean = sum(alphas) / len(alphas)
 
     # Return the color with the calculated alpha
+    if isinstance(color, Color):
+        return Color(color.L, color.a, color.b, alpha_mean)
     return rgba_to_hex(color_rgb + [alpha_mean])
@@ -0,0 +1,116 @@
+"""Lazy derivation graphs."""
+
+import collections
+
+
+def identity(value):
+    """Return the value unchanged."""
+    return value
+
+
+class DerivationGraph:
+    """Named values derived from each other, evaluated lazily.
+
+    A node is either an input, set with `set`, or derived by applying a
+    function to the values of other nodes. Derived values are memoized.
+    Setting an input marks its transitive dependents dirty, so only they
+    are recomputed when next accessed.
+    """
+
+    def __init__(self):
+        self.inputs = {}
+        self.derivations = {}  # name -> (function, input names)
+        self.dependents = collections.defaultdict(list)
+        self.values = {}  # memoized values of inputs and clean derived nodes
+        self.evaluations = 0
+
+    def __contains__(self, name):
+        return name in self.inputs or name in self.derivations
+
+    def set(self, name, value):
+        """Set the value of an input node, marking its dependents dirty."""
+        if name in self.derivations:
+            raise ValueError(f"{name!r} is a derived node.")
+        if name in self.inputs and self.inputs[name] == value:
+            return
+        self.inputs[name] = value
+        self.values[name] = value
+        self._invalidate(name)
+
+    def derive(self, name, function, *inputs) -> str:
+        """Add a node whose value is `function` applied to the values of `inputs`."""
+        if name in self:
+            raise ValueError(f"Node {name!r} already exists.")
+        self.derivations[name] = (function, inputs)
+        for input_name in inputs:
+            self.dependents[input_name].append(name)
+        return name
+
+    def apply(self, function, input_name) -> str:
+        """Return a node applying a function to another node, adding it if needed.
+
+        The node is named after the function and its input, so equal
+        subexpressions share a node.
+        """
+        name = f"{function.__name__}({input_name})"
+        if name not in self:
+            self.derive(name, function, input_name)
+        return name
+
+    def alias(self, name, target) -> str:
+        """Add a node with the value of another node."""
+        return self.derive(name, identity, target)
+
+    def _invalidate(self, name):
+        # A node that is not memoized has no memoized dependents.
+        stack = list(self.dependents[name])
+        while stack:
+            dependent = stack.pop()
+            if dependent in self.values:
+                del self.values[dependent]
+                stack.extend(self.dependents[dependent])
+
+    def __getitem__(self, name):
+        try:
+            return self.values[name]
+        except KeyError:
+            pass
+        try:
+            function, inputs = self.derivations[name]
+        except KeyError:
+            raise KeyError(f"Unknown or unset node {name!r}.") from None
+        value = function(*(self[input_name] for input_name in inputs))
+        self.values[name] = value
+        self.evaluations += 1
+        return value
+
+    def evaluate(self, names) -> dict:
+        """Return the values of the named nodes."""
+        return {name: self[name] for name in names}
+
+    def dirty(self) -> frozenset[str]:
+        """Return the derived nodes that are not memoized."""
+        return frozenset(self.derivations.keys() - self.values.keys())
+
+    def export(self) -> dict:
+        """Return the nodes as plain data (JSON serializable, input values as strings)."""
+        return {
+            "inputs": {name: str(value) for name, value in self.inputs.items()},
+            "derived": {
+                name: {"function": function.__name__, "inputs": list(inputs)}
+                for name, (function, inputs) in self.derivations.items()
+            },
+        }
+
+    def to_dot(self) -> str:
+        """Return the graph in Graphviz DOT notation."""
+        lines = ["digraph derivation {", "    rankdir=LR;"]
+        for name, value in self.inputs.items():
+            lines.append(f'    "{name}" [shape=box, label="{name}\\n{value}"];')
+        for name, (function, inputs) in self.derivations.items():
+            if function is not identity:
+                lines.append(f'    "{name}" [label="{function.__name__}"];')
+            for input_name in inputs:
+                lines.append(f'    "{input_name}" -> "{name}";')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
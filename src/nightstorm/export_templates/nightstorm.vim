@@ -0,0 +1,86 @@
+" Nightstorm $variant$
+
+set background=dark
+hi clear
+if exists("syntax_on")
+    syntax reset
+endif
+let g:colors_name = "nightstorm-$variant_name$"
+
+" editor
+hi Normal guifg=$white$ guibg=$editor_background$ gui=NONE
+hi NormalFloat guifg=$white$ guibg=$sidebar_background$ gui=NONE
+hi Cursor guifg=$editor_background$ guibg=$white$ gui=NONE
+hi CursorLine guibg=$line_highlight$ gui=NONE
+hi CursorLineNr guifg=$white$ guibg=$editor_background$ gui=NONE
+hi LineNr guifg=$linenumber$ guibg=$editor_background$ gui=NONE
+hi SignColumn guibg=$editor_background$ gui=NONE
+hi ColorColumn guibg=$line_highlight$ gui=NONE
+hi VertSplit guifg=$border$ guibg=$editor_background$ gui=NONE
+hi WinSeparator guifg=$border$ guibg=$editor_background$ gui=NONE
+hi NonText guifg=$indent_guide$ gui=NONE
+hi Whitespace guifg=$indent_guide$ gui=NONE
+hi Folded guifg=$white$ guibg=$fold_background$ gui=NONE
+hi FoldColumn guifg=$linenumber$ guibg=$editor_background$ gui=NONE
+hi Visual guibg=$dimmed_accent$ gui=NONE
+hi Search guifg=$pure_black$ guibg=$findmatch$ gui=NONE
+hi IncSearch guifg=$pure_black$ guibg=$vivid_accent$ gui=NONE
+hi MatchParen guibg=$word_highlight$ gui=NONE
+hi Pmenu guifg=$sidebar_foreground$ guibg=$sidebar_background$ gui=NONE
+hi PmenuSel guifg=$pure_white$ guibg=$dimmed_accent$ gui=NONE
+hi PmenuSbar guibg=$sidebar_background$ gui=NONE
+hi PmenuThumb guibg=$scrollbar$ gui=NONE
+hi StatusLine guifg=$opaque_statusbar_foreground$ guibg=$sidebar_background$ gui=NONE
+hi StatusLineNC guifg=$gray$ guibg=$sidebar_background$ gui=NONE
+hi TabLine guifg=$gray$ guibg=$sidebar_background$ gui=NONE
+hi TabLineFill guibg=$sidebar_background$ gui=NONE
+hi TabLineSel guifg=$pure_white$ guibg=$editor_background$ gui=NONE
+hi Directory guifg=$09$ gui=NONE
+hi Title guifg=$13$ gui=bold
+hi ErrorMsg guifg=$underlined_error$ guibg=NONE gui=NONE
+hi WarningMsg guifg=$underlined_warning$ guibg=NONE gui=NONE
+hi ModeMsg guifg=$white$ gui=NONE
+hi MoreMsg guifg=$05$ gui=NONE
+hi Question guifg=$05$ gui=NONE
+hi SpellBad guisp=$underlined_error$ gui=undercurl
+hi SpellCap guisp=$underlined_info$ gui=undercurl
+
+" syntax
+hi Comment guifg=$gray$ gui=NONE
+hi Constant guifg=$03$ gui=NONE
+hi String guifg=$05$ gui=NONE
+hi Character guifg=$05$ gui=NONE
+hi Number guifg=$04$ gui=NONE
+hi Float guifg=$04$ gui=NONE
+hi Boolean guifg=$03$ gui=NONE
+hi Identifier guifg=$white$ gui=NONE
+hi Function guifg=$09$ gui=NONE
+hi Statement guifg=$01$ gui=NONE
+hi Operator guifg=$white$ gui=NONE
+hi PreProc guifg=$01$ gui=NONE
+hi Type guifg=$06$ gui=NONE
+hi Special guifg=$01$ gui=NONE
+hi Tag guifg=$08$ gui=NONE
+hi Delimiter guifg=$white$ gui=NONE
+hi Underlined guifg=$09$ gui=underline
+hi Todo guifg=$14$ guibg=NONE gui=bold
+hi Error guifg=$underlined_error$ guibg=NONE gui=NONE
+
+" diff
+hi DiffAdd guibg=$diff_inserted$ gui=NONE
+hi DiffDelete guibg=$diff_removed$ gui=NONE
+hi DiffChange guibg=$fold_background$ gui=NONE
+hi DiffText guibg=$word_highlight_strong$ gui=NONE
+
+" terminal
+let g:terminal_ansi_colors = [
+    \ "$pure_black$", "$ansi_red$", "$ansi_green$", "$ansi_yellow$",
+    \ "$ansi_blue$", "$ansi_magenta$", "$ansi_cyan$", "$white$",
+    \ "$ansi_bright_black$", "$ansi_bright_red$", "$ansi_bright_green$", "$ansi_bright_yellow$",
+    \ "$ansi_bright_blue$", "$ansi_bright_magenta$", "$ansi_bright_cyan$", "$ansi_bright_white$",
+    \ ]
+if has("nvim")
+    for i in range(16)
+        let g:terminal_color_{i} = g:terminal_ansi_colors[i]
+    endfor
+endif
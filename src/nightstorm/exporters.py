@@ -0,0 +1,128 @@
+"""Export of theme variants to other applications' formats.
+
+Each variant's color map is computed once and rendered by every selected
+exporter. An exporter is a compiled template (a package resource, filled
+like the VS Code template) with an output file name, so adding a format is
+adding an entry to `EXPORTERS`.
+"""
+
+import argparse
+import functools
+import os
+from importlib.resources import files
+from pathlib import Path
+from typing import NamedTuple
+import nightstorm
+from nightstorm import profiling
+from nightstorm.bulk_export import add_hex_argument, hex_accents
+from nightstorm.generate_themes import (
+    VARIANTS,
+    color_names,
+    compute_color_map,
+    get_base_chromatic_palette,
+    job_count,
+)
+from nightstorm.incremental import write_if_changed
+from nightstorm.templating import CompiledTemplate
+
+
+class Exporter(NamedTuple):
+    """A template resource and the name of its output files."""
+    template: str  # path relative to the package
+    filename: str  # formatted with `variant` (the variant name)
+
+
+EXPORTERS = {
+    "vscode": Exporter("template.json", "Nightstorm-{variant}.json"),
+    "alacritty": Exporter("export_templates/alacritty.toml", "Nightstorm-{variant}.toml"),
+    "kitty": Exporter("export_templates/kitty.conf", "Nightstorm-{variant}.conf"),
+    "windows_terminal": Exporter("export_templates/windows_terminal.json",
+                                 "Nightstorm-{variant}.json"),
+    "xresources": Exporter("export_templates/Xresources", "Nightstorm-{variant}.Xresources"),
+    "css": Exporter("export_templates/nightstorm.css", "nightstorm-{variant}.css"),
+    "vim": Exporter("export_templates/nightstorm.vim", "nightstorm-{variant}.vim"),
+}
+
+
+def variant_keys(variant_name) -> dict[str, str]:
+    """Return the placeholders naming a variant (besides the colors)."""
+    return {"$variant$": variant_name.capitalize(), "$variant_name$": variant_name}
+
+
+@functools.cache
+def load_export_template(resource: str) -> CompiledTemplate:
+    """Load and compile an exporter template."""
+    keys = {f"${name}$" for name in color_names(get_base_chromatic_palette())} \
+        | variant_keys("").keys()
+    return CompiledTemplate((files(nightstorm)/resource).read_text(), keys)
+
+
+def export_path(format_name, variant_name, output_dir) -> Path:
+    """Return the path of an exported file (in a directory per format)."""
+    return output_dir/format_name/EXPORTERS[format_name].filename.format(variant=variant_name)
+
+
+def _write(task) -> bool:
+    template, mapping, path = task
+    return write_if_changed(path, template.render(mapping).encode())
+
+
+def export_variants(variants, output_dir, formats=tuple(EXPORTERS), jobs=1) -> list[Path]:
+    """Export theme variants to the given formats and return the written paths.
+
+    The color map of each variant is computed once and shared by all
+    formats. Rendering and writing run in `jobs` threads; files whose
+    content did not change are left untouched.
+    """
+    templates = {name: load_export_template(EXPORTERS[name].template) for name in formats}
+    palette = get_base_chromatic_palette()
+    tasks = []
+    for variant_name, accent_color in variants:
+        with profiling.scope(variant_name), profiling.stage("color_map"):
+            mapping = compute_color_map(accent_color, palette) | variant_keys(variant_name)
+        for name in formats:
+            tasks.append((templates[name], mapping, export_path(name, variant_name, output_dir)))
+    for name in formats:
+        (output_dir/name).mkdir(parents=True, exist_ok=True)
+
+    if jobs == 1:
+        written = list(map(_write, tasks))
+    else:
+        from concurrent.futures import ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            written = list(executor.map(_write, tasks))
+    return [path for (_, _, path), changed in zip(tasks, written) if changed]
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "output_dir",
+        nargs="?",
+        default=Path.cwd()/"exports",
+        type=Path,
+        help="output directory, with a subdirectory per format (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-f", "--format",
+        action="append",
+        choices=EXPORTERS,
+        dest="formats",
+        help="format to export (repeatable, default: all)",
+    )
+    add_hex_argument(parser, default=[])
+    parser.add_argument(
+        "-j", "--jobs",
+        default=1,
+        type=job_count,
+        help="number of threads to write files in, 0 for one per CPU (default: %(default)s)",
+    )
+    args = parser.parse_args()
+    written = export_variants([*VARIANTS, *hex_accents(args.hex)], args.output_dir,
+                              args.formats or tuple(EXPORTERS), jobs=args.jobs or os.cpu_count())
+    print(f"{len(written)} files written to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
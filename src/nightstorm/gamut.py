@@ -0,0 +1,91 @@
+"""sRGB gamut mapping in Oklab.
+
+Colors are mapped into the gamut by reducing chroma at constant lightness
+and hue. The largest in-gamut chroma is tabulated once over a hue ×
+lightness grid, so mapping a color is a table lookup with bilinear
+interpolation instead of an iterative search. Interpolation may overshoot
+the true boundary by about 0.001 in chroma; callers clip the resulting
+linear RGB channels as before.
+"""
+# pylint: disable=invalid-name
+
+import functools
+import math
+import numpy as np
+from nightstorm import vectorized
+
+HUE_STEPS = 720
+LIGHTNESS_STEPS = 128
+BISECTION_ITERATIONS = 24
+MAX_CHROMA = 0.5  # above the chroma of any sRGB color
+
+
+@functools.cache
+def max_chroma_table() -> np.ndarray:
+    """Tabulate the largest in-gamut chroma over hue × lightness.
+
+    Rows are hues from 0 to 2π (exclusive) and columns lightnesses from 0 to
+    1 (inclusive). Chroma is found by bisection, which is exact up to
+    floating-point precision because each constant-hue, constant-lightness
+    line leaves the gamut only once.
+    """
+    h = np.linspace(0, 2*math.pi, HUE_STEPS, endpoint=False)[:, np.newaxis]
+    L = np.linspace(0, 1, LIGHTNESS_STEPS + 1)[np.newaxis, :]
+    L, h = np.broadcast_arrays(L, h)
+    low = np.zeros(L.shape)
+    high = np.full(L.shape, MAX_CHROMA)
+    for _ in range(BISECTION_ITERATIONS):
+        C = (low + high)/2
+        rgb = vectorized.oklab_to_linear_rgb(vectorized.lch_to_lab(np.stack([L, C, h], axis=-1)))
+        inside = ((rgb >= 0) & (rgb <= 1)).all(axis=-1)
+        low = np.where(inside, C, low)
+        high = np.where(inside, high, C)
+    return low
+
+
+@functools.cache
+def _max_chroma_rows() -> list[list[float]]:
+    return max_chroma_table().tolist()
+
+
+def max_chroma(L: float, h: float) -> float:
+    """Return the largest in-gamut chroma at the given lightness and hue."""
+    rows = _max_chroma_rows()
+    x = (h % (2*math.pi))/(2*math.pi)*HUE_STEPS
+    i = min(int(x), HUE_STEPS - 1)
+    fx = x - i
+    y = min(max(L, 0), 1)*LIGHTNESS_STEPS
+    j = min(int(y), LIGHTNESS_STEPS - 1)
+    fy = y - j
+    row0 = rows[i]
+    row1 = rows[(i + 1) % HUE_STEPS]
+    return ((1 - fx)*((1 - fy)*row0[j] + fy*row0[j + 1])
+            + fx*((1 - fy)*row1[j] + fy*row1[j + 1]))
+
+
+def max_chroma_array(L, h) -> np.ndarray:
+    """Return the largest in-gamut chromas at the given lightnesses and hues."""
+    table = max_chroma_table()
+    x = np.mod(h, 2*math.pi)/(2*math.pi)*HUE_STEPS
+    i = np.minimum(x.astype(int), HUE_STEPS - 1)
+    fx = x - i
+    y = np.clip(L, 0, 1)*LIGHTNESS_STEPS
+    j = np.minimum(y.astype(int), LIGHTNESS_STEPS - 1)
+    fy = y - j
+    i1 = (i + 1) % HUE_STEPS
+    return ((1 - fx)*((1 - fy)*table[i, j] + fy*table[i, j + 1])
+            + fx*((1 - fy)*table[i1, j] + fy*table[i1, j + 1]))
+
+
+def map_lch(L: float, C: float, h: float) -> tuple[float, float, float]:
+    """Map LCh-coordinates into the sRGB gamut by reducing chroma."""
+    L = min(max(L, 0), 1)
+    return L, min(C, max_chroma(L, h)), h
+
+
+def map_lch_array(lch) -> np.ndarray:
+    """Map arrays of LCh-coordinates into the sRGB gamut by reducing chroma."""
+    lch = np.asarray(lch, dtype=float)
+    L = np.clip(lch[..., 0], 0, 1)
+    h = lch[..., 2]
+    return np.stack([L, np.minimum(lch[..., 1], max_chroma_array(L, h)), h], axis=-1)
@@ -1,22 +1,12 @@
 """Icon generation."""
 
 import argparse
+import os
 from pathlib import Path
 import skia
 from shapely.geometry import box, Point, LineString
-from nightstorm.generate_themes import base_chromatic_palette
-
-parser = argparse.ArgumentParser()
-parser.add_argument(
-    "output_dir",
-    nargs="?",
-    default=Path.cwd()/"images",
-    type=Path,
-    help="output directory (default: %(default)s)",
-)
-args = parser.parse_args()
-output_dir = args.output_dir
-output_dir.mkdir(parents=True, exist_ok=True)
+from nightstorm.generate_themes import get_base_chromatic_palette, job_count
+from nightstorm.incremental import Manifest, atomic_write, digest, source_digest
 
 grid_size = 4  # pylint: disable=invalid-name
 square_size = 49  # pylint: disable=invalid-name
@@ -24,76 +14,225 @@ spacing = 12  # pylint: disable=invalid-name
 canvas_size = grid_size*square_size + (grid_size + 1)*spacing  # pylint: disable=invalid-name
 assert canvas_size == 256
 canvas_center = (canvas_size//2, canvas_size//2)
-shapes = []
-colors = []
-
-# Background circles.
-shapes.append(Point(canvas_center).buffer(canvas_size//2))
-colors.append(skia.ColorSetARGB(0x60, 0x80, 0x80, 0x80))
-shapes.append(Point(canvas_center).buffer(canvas_size//2 - spacing + spacing//2))
-colors.append(skia.ColorSetRGB(0x20, 0x20, 0x20))
-
-# Grid of squares intersected with a circle.
-circle = Point(canvas_center).buffer(canvas_size//2 - 2*spacing + spacing//2)
-for row in range(grid_size):
-    for column in range(grid_size):
-        x = spacing + column*(square_size + spacing)
-        y = spacing + row*(square_size + spacing)
-        square = box(x, y, x + square_size, y + square_size)
-        shapes.append(square.intersection(circle).normalize().simplify(0.5))
-order = [
-    0,  2,  5,  9,
-    1,  4,  8, 12,
-    3,  7, 11, 14,
-    6, 10, 13,  0,
-]
-colors.extend(
-    skia.ColorSetRGB(*[int(x[i:i+2], 16) for i in (1, 3, 5)])
-    for x in [base_chromatic_palette[o] for o in order]
-)
-
-# Rain lines.
-rain_lines = []
-for i in range(-canvas_size, canvas_size, canvas_size//20):
-    line = LineString([(i + canvas_size, 0), (i, canvas_size)])
-    clipped_line = line.intersection(circle.buffer(5))
-    if not clipped_line.is_empty:
-        rain_lines.append(clipped_line)
-shapes.extend(rain_lines)
-colors.extend([skia.ColorSetARGB(0x40, 0x20, 0x20, 0x20)]*len(rain_lines))
-
-# Draw.
-recorder = skia.PictureRecorder()  # for saving to multiple formats
-canvas = recorder.beginRecording(canvas_size, canvas_size)
-for shape, color in zip(shapes, colors):
-    # Convert Shapely shape to Skia path.
-    path = skia.Path()
-    is_region = not isinstance(shape, LineString)
-    for i, (x, y) in enumerate(shape.exterior.coords if is_region else shape.coords):
-        (path.moveTo if i == 0 else path.lineTo)(x, y)
-    path.close()
-
-    # Draw the path (with rounded corners).
-    paint = skia.Paint(
-        AntiAlias=True,
-        Color=color,
-        Style=skia.Paint.kFill_Style if is_region else skia.Paint.kStroke_Style,
-        PathEffect=skia.CornerPathEffect.Make(radius=10) if is_region else None,
-        StrokeWidth=0 if is_region else 1.5,
+
+
+def icon_shapes() -> list[tuple]:
+    """Return the shapes of the icon with their colors, from bottom to top."""
+    base_chromatic_palette = get_base_chromatic_palette()
+    shapes = []
+    colors = []
+
+    # Background circles.
+    shapes.append(Point(canvas_center).buffer(canvas_size//2))
+    colors.append(skia.ColorSetARGB(0x60, 0x80, 0x80, 0x80))
+    shapes.append(Point(canvas_center).buffer(canvas_size//2 - spacing + spacing//2))
+    colors.append(skia.ColorSetRGB(0x20, 0x20, 0x20))
+
+    # Grid of squares intersected with a circle.
+    circle = Point(canvas_center).buffer(canvas_size//2 - 2*spacing + spacing//2)
+    for row in range(grid_size):
+        for column in range(grid_size):
+            x = spacing + column*(square_size + spacing)
+            y = spacing + row*(square_size + spacing)
+            square = box(x, y, x + square_size, y + square_size)
+            shapes.append(square.intersection(circle).normalize().simplify(0.5))
+    order = [
+        0,  2,  5,  9,
+        1,  4,  8, 12,
+        3,  7, 11, 14,
+        6, 10, 13,  0,
+    ]
+    colors.extend(
+        skia.ColorSetRGB(*[int(x[i:i+2], 16) for i in (1, 3, 5)])
+        for x in [base_chromatic_palette[o] for o in order]
     )
-    canvas.drawPath(path, paint)
-picture = recorder.finishRecordingAsPicture()
-
-# Save as SVG.
-stream = skia.FILEWStream(str(output_dir/"icon.svg"))
-svg_canvas = skia.SVGCanvas.Make((canvas_size, canvas_size), stream)
-svg_canvas.drawPicture(picture)
-del svg_canvas
-stream.flush()
-
-# Save as PNG.
-surface = skia.Surface(canvas_size, canvas_size)
-image_canvas = surface.getCanvas()
-image_canvas.drawPicture(picture)
-image = surface.makeImageSnapshot()
-image.save(str(output_dir/"icon.png"), skia.kPNG)
+
+    # Rain lines.
+    rain_lines = []
+    for i in range(-canvas_size, canvas_size, canvas_size//20):
+        line = LineString([(i + canvas_size, 0), (i, canvas_size)])
+        clipped_line = line.intersection(circle.buffer(5))
+        if not clipped_line.is_empty:
+            rain_lines.append(clipped_line)
+    shapes.extend(rain_lines)
+    colors.extend([skia.ColorSetARGB(0x40, 0x20, 0x20, 0x20)]*len(rain_lines))
+    return list(zip(shapes, colors))
+
+
+def draw_shapes(shapes) -> skia.Picture:
+    """Draw colored Shapely shapes (regions filled, lines stroked) into a recorded picture."""
+    recorder = skia.PictureRecorder()  # for saving to multiple formats
+    canvas = recorder.beginRecording(canvas_size, canvas_size)
+    for shape, color in shapes:
+        # Convert Shapely shape to Skia path.
+        path = skia.Path()
+        is_region = not isinstance(shape, LineString)
+        for i, (x, y) in enumerate(shape.exterior.coords if is_region else shape.coords):
+            (path.moveTo if i == 0 else path.lineTo)(x, y)
+        path.close()
+
+        # Draw the path (with rounded corners).
+        paint = skia.Paint(
+            AntiAlias=True,
+            Color=color,
+            Style=skia.Paint.kFill_Style if is_region else skia.Paint.kStroke_Style,
+            PathEffect=skia.CornerPathEffect.Make(radius=10) if is_region else None,
+            StrokeWidth=0 if is_region else 1.5,
+        )
+        canvas.drawPath(path, paint)
+    return recorder.finishRecordingAsPicture()
+
+
+def record_icon() -> skia.Picture:
+    """Draw the icon into a recorded picture."""
+    return draw_shapes(icon_shapes())
+
+
+RASTER_FORMATS = {"png": skia.kPNG, "webp": skia.kWEBP}
+FORMATS = ("svg", *RASTER_FORMATS)
+SIZES = (16, 24, 32, 48, 64, 128, 256, 512, 1024)
+
+
+def icon_filename(size: int, image_format: str) -> str:
+    """Return the file name of the icon in the given size and format."""
+    if image_format == "svg" or size == canvas_size:
+        return f"icon.{image_format}"
+    return f"icon-{size}.{image_format}"
+
+
+def encode_svg(picture: skia.Picture) -> bytes:
+    """Encode the icon as SVG."""
+    stream = skia.DynamicMemoryWStream()
+    svg_canvas = skia.SVGCanvas.Make((canvas_size, canvas_size), stream)
+    svg_canvas.drawPicture(picture)
+    del svg_canvas
+    return bytes(stream.detachAsData())
+
+
+def encode_raster(picture: skia.Picture, size: int, image_format: str) -> bytes:
+    """Rasterize the icon at the given size and encode it (losslessly)."""
+    surface = skia.Surface(size, size)
+    image_canvas = surface.getCanvas()
+    image_canvas.scale(size/canvas_size, size/canvas_size)
+    image_canvas.drawPicture(picture)
+    image = surface.makeImageSnapshot()
+    return bytes(image.encodeToData(RASTER_FORMATS[image_format], 100))
+
+
+def _encode_in_worker(task):
+    picture_data, size, image_format = task
+    picture = skia.Picture.MakeFromData(skia.Data.MakeWithCopy(picture_data))
+    return encode_raster(picture, size, image_format)
+
+
+def encode_icon(picture: skia.Picture, sizes=(canvas_size,), formats=("svg", "png"),
+                jobs=1) -> dict[str, bytes]:
+    """Encode the icon in the given sizes and formats.
+
+    Every size is rasterized from the same recorded picture. With jobs > 1,
+    rasterization and encoding run in a process pool, which receives the
+    picture in serialized form.
+    """
+    encoded = {}
+    if "svg" in formats:
+        encoded[icon_filename(canvas_size, "svg")] = encode_svg(picture)
+    tasks = [(size, image_format) for image_format in formats if image_format != "svg"
+             for size in sizes]
+    if jobs == 1:
+        results = (encode_raster(picture, size, image_format) for size, image_format in tasks)
+        encoded.update(zip((icon_filename(*task) for task in tasks), results))
+        return encoded
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    picture_data = bytes(picture.serialize())
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(_encode_in_worker, [(picture_data, *task) for task in tasks])
+        encoded.update(zip((icon_filename(*task) for task in tasks), results))
+    return encoded
+
+
+def export_icon(output_dir: Path, sizes=(canvas_size,), formats=("svg", "png"), jobs=1,
+                incremental=False) -> list[str]:
+    """Write the icon in the given sizes and formats and return the file names.
+
+    In incremental mode, nothing is drawn or written if the manifest in
+    `output_dir` shows that all requested files are up to date.
+    """
+    names = list(dict.fromkeys(icon_filename(size, image_format)
+                               for image_format in formats for size in sizes))
+    if not incremental:
+        for name, data in encode_icon(record_icon(), sizes, formats, jobs).items():
+            atomic_write(output_dir/name, data)
+        return names
+
+    manifest = Manifest(output_dir)
+    input_digest = digest(source_digest("generate_icon"), *get_base_chromatic_palette())
+    if all(manifest.is_up_to_date(output_dir/name, input_digest) for name in names):
+        return names
+    for name, data in encode_icon(record_icon(), sizes, formats, jobs).items():
+        manifest.write(output_dir/name, data, input_digest)
+    manifest.save()
+    return names
+
+
+def pixel_size(value: str) -> int:
+    """Parse a positive raster size argument."""
+    size = int(value)
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size {value!r} (expected a positive integer)")
+    return size
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "output_dir",
+        nargs="?",
+        default=Path.cwd()/"images",
+        type=Path,
+        help="output directory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=[canvas_size],
+        type=pixel_size,
+        metavar="SIZE",
+        help=f"raster sizes in pixels, e.g. {' '.join(map(str, SIZES))} "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--all-sizes",
+        dest="sizes",
+        action="store_const",
+        const=list(SIZES),
+        help="rasterize all standard sizes",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=["svg", "png"],
+        choices=FORMATS,
+        metavar="FORMAT",
+        help=f"output formats, any of {', '.join(FORMATS)} (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        default=1,
+        type=job_count,
+        help="number of processes to encode in, 0 for one per CPU (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only regenerate the icon if its inputs changed since the last build",
+    )
+    args = parser.parse_args()
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    export_icon(output_dir, args.sizes, args.formats, args.jobs or os.cpu_count(),
+                args.incremental)
+
+
+if __name__ == "__main__":
+    main()
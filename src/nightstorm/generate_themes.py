@@ -1,150 +1,369 @@
 """Theme generation."""
 
 import argparse
+import contextlib
+import functools
+import json
 import math
-import re
+import os
+import sys
 from importlib.resources import files
 from pathlib import Path
 import nightstorm
-from nightstorm.color_manipulation import oklab_adjust, deopacify
+from nightstorm import profiling
+from nightstorm.color_manipulation import Color, oklab_adjust, deopacify
+from nightstorm.derivation import DerivationGraph
+from nightstorm.incremental import Manifest, atomic_write, digest, source_digest
+from nightstorm.templating import CompiledTemplate
 
-# Create an Oklab rainbow palette.
+BASE_COLOR = "#cc8080"
 n = 15  # pylint: disable=invalid-name
 ts = [float(x)/(n) for x in range(n)]  # np.linspace(0, 1, n)
-base_chromatic_palette = [oklab_adjust("#cc8080", hue_addend=t*2*math.pi) for t in ts]
-
-
-def generate_theme_variant(accent_color, variant_name, output_dir):
-    """Generate a theme variant with the given accent color index."""
-
-    def deepen(hex_color):
-        return oklab_adjust(hex_color, lightness_factor=0.85, chroma_factor=1.9)
-
-    def soften(hex_color):
-        return oklab_adjust(hex_color, lightness_factor=1.15, chroma_factor=0.9)
-
-    def vividify(hex_color):
-        return oklab_adjust(hex_color, lightness_factor=1.05, chroma_factor=1.2)
-
-    def saturate(hex_color):
-        return oklab_adjust(hex_color, lightness_factor=1.1, chroma_factor=2.5)
-
-    def dim(hex_color):
-        return oklab_adjust(hex_color, lightness_factor=0.6, chroma_factor=0.7)
-
-    color_map = {f"${i:02}$": color for i, color in enumerate(base_chromatic_palette)}
-    color_map.update({
-        # accent
-        "$accent$": base_chromatic_palette[accent_color],
-        "$deep_accent$": deepen(base_chromatic_palette[accent_color]),
-        "$highlighted_deep_accent$": soften(deepen(base_chromatic_palette[accent_color])),
-        "$dimmed_accent$": dim(base_chromatic_palette[accent_color]),
-        "$vivid_accent$": vividify(base_chromatic_palette[accent_color]),
-
-        # achromatic
-        "$pure_white$": "#ffffff",
-        "$sidebar_foreground$": "#e0e0e0",
-        "$ansi_bright_white$": "#cccccc",
-        "$white$": "#bbbbbb",
-        "$opaque_statusbar_foreground$": "#a0a0a0",  # actual fg /w alpha for better hover
-        "$gray$": "#808080",
-        "$word_highlight$": "#777777",
-        "$ansi_bright_black$": "#666666",
-        "$scrollbar$": "#505050",
-        "$linenumber$": "#505050",
-        "$active_background$": "#505050",
-        "$menu_border$": "#444444",
-        "$border$": "#3c3c3c",
-        "$indent_guide$": "#343434",
-        "$sidebar_background$": "#2c2c2c",
-        "$line_highlight$": "#282828",
-        "$editor_background$": "#202020",
-        "$pure_black$": "#000000",
-
-        # terminal
-        "$ansi_bright_red$": soften(deepen(base_chromatic_palette[0])),
-        "$ansi_bright_yellow$": soften(deepen(base_chromatic_palette[3])),
-        "$ansi_bright_green$": soften(deepen(base_chromatic_palette[6])),
-        "$ansi_bright_cyan$": soften(deepen(base_chromatic_palette[8])),
-        "$ansi_bright_blue$": soften(deepen(base_chromatic_palette[9])),
-        "$ansi_bright_magenta$": soften(deepen(base_chromatic_palette[13])),
-        "$ansi_red$": deepen(base_chromatic_palette[0]),
-        "$ansi_yellow$": deepen(base_chromatic_palette[3]),
-        "$ansi_green$": deepen(base_chromatic_palette[6]),
-        "$ansi_cyan$": deepen(base_chromatic_palette[8]),
-        "$ansi_blue$": deepen(base_chromatic_palette[9]),
-        "$ansi_magenta$": deepen(base_chromatic_palette[13]),
-
-        # source control graph
-        "$gitgraph_1$": saturate(base_chromatic_palette[6]),
-        "$gitgraph_2$": saturate(base_chromatic_palette[3]),
-        "$gitgraph_3$": saturate(base_chromatic_palette[0]),
-        "$gitgraph_4$": saturate(base_chromatic_palette[8]),
-        "$gitgraph_5$": saturate(base_chromatic_palette[13]),
-        "$gitgraph_ref$": saturate(base_chromatic_palette[10]),
-        "$gitgraph_remoteref$": base_chromatic_palette[12],
-        "$gitgraph_baseref$": deepen(base_chromatic_palette[1]),
-        "$gitgraph_additions$": soften(base_chromatic_palette[5]),
-        "$gitgraph_deletions$": soften(base_chromatic_palette[0]),
-
-        # editor error/warning/info squiggly underlines
-        "$underlined_error$": saturate(base_chromatic_palette[0]),
-        "$underlined_warning$": saturate(base_chromatic_palette[3]),
-        "$underlined_info$": saturate(base_chromatic_palette[10]),
-
-        # minimap error/warning/info
-        "$minimap_error$": soften(deepen(base_chromatic_palette[0])),
-        "$minimap_warning$": soften(deepen(base_chromatic_palette[3])),
-        "$minimap_info$": soften(deepen(base_chromatic_palette[10])),
-
-        # explorer/tab filenames
-        "$file_error$": vividify(base_chromatic_palette[0]),
-        "$file_warning$": vividify(base_chromatic_palette[3]),
-        "$file_modified$": vividify(base_chromatic_palette[9]),
-        "$file_added$": vividify(base_chromatic_palette[5]),
-        "$file_untracked$": vividify(base_chromatic_palette[1]),
-        "$file_renamed$": vividify(base_chromatic_palette[8]),
-
-        # editor gutter
-        "$editorgutter_added$": soften(dim(base_chromatic_palette[5])),
-        "$editorgutter_modified$": soften(dim(base_chromatic_palette[9])),
-        "$editorgutter_deleted$": soften(dim(base_chromatic_palette[0])),
-
-        # diff
-        "$diff_inserted$": dim(base_chromatic_palette[5]),
-        "$diff_removed$": dim(base_chromatic_palette[0]),
-
-        # merge
-        "$merge_current$": dim(base_chromatic_palette[1]),
-        "$merge_current_header$": vividify(base_chromatic_palette[1]),
-        "$merge_incoming$": dim(base_chromatic_palette[8]),
-        "$merge_incoming_header$": vividify(base_chromatic_palette[8]),
-        "$merge_editor_change$": dim(base_chromatic_palette[14]),
-        "$merge_editor_change_word$": base_chromatic_palette[14],
-
-        # match highlights
-        "$word_highlight_strong$": deepen(base_chromatic_palette[9]),
-        "$findmatch$": soften(deepen(base_chromatic_palette[6])),
-        "$repeating_selection$": dim(base_chromatic_palette[6]),
-
-        # miscellaneous
-        "$fold_background$": dim(base_chromatic_palette[9]),
-        "$breakpoint_foreground$": deepen(base_chromatic_palette[1]),
-    })
-    color_map["$transparent_statusbar_foreground$"] = deopacify(
-        color="#ffffff",
-        background=color_map["$sidebar_background$"],
-        target=color_map["$opaque_statusbar_foreground$"],
+
+# Variant names with their accent color indices.
+VARIANTS = (
+    ("orange", 2),
+    ("turquoise", 7),
+    ("cyan", 8),
+    ("blue", 10),
+    ("magenta", 13),
+)
+
+
+@functools.cache
+def get_base_chromatic_palette() -> tuple[str, ...]:
+    """Create an Oklab rainbow palette (on first use)."""
+    with profiling.stage("palette"):
+        return tuple(oklab_adjust(BASE_COLOR, hue_addend=t*2*math.pi) for t in ts)
+
+
+def __getattr__(name):
+    if name == "base_chromatic_palette":
+        return get_base_chromatic_palette()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Lightness and chroma factors of the color transforms.
+ADJUSTMENTS = {
+    "deepen": (0.85, 1.9),
+    "soften": (1.15, 0.9),
+    "vividify": (1.05, 1.2),
+    "saturate": (1.1, 2.5),
+    "dim": (0.6, 0.7),
+}
+
+
+def deepen(color):
+    """Darken and intensify a color."""
+    return oklab_adjust(color, *ADJUSTMENTS["deepen"])
+
+
+def soften(color):
+    """Lighten and mute a color."""
+    return oklab_adjust(color, *ADJUSTMENTS["soften"])
+
+
+def vividify(color):
+    """Slightly lighten and intensify a color."""
+    return oklab_adjust(color, *ADJUSTMENTS["vividify"])
+
+
+def saturate(color):
+    """Strongly intensify a color."""
+    return oklab_adjust(color, *ADJUSTMENTS["saturate"])
+
+
+def dim(color):
+    """Darken and mute a color."""
+    return oklab_adjust(color, *ADJUSTMENTS["dim"])
+
+
+# Achromatic colors by name.
+ACHROMATIC_COLORS = {
+    "pure_white": "#ffffff",
+    "sidebar_foreground": "#e0e0e0",
+    "ansi_bright_white": "#cccccc",
+    "white": "#bbbbbb",
+    "opaque_statusbar_foreground": "#a0a0a0",  # actual fg /w alpha for better hover
+    "gray": "#808080",
+    "word_highlight": "#777777",
+    "ansi_bright_black": "#666666",
+    "scrollbar": "#505050",
+    "linenumber": "#505050",
+    "active_background": "#505050",
+    "menu_border": "#444444",
+    "border": "#3c3c3c",
+    "indent_guide": "#343434",
+    "sidebar_background": "#2c2c2c",
+    "line_highlight": "#282828",
+    "editor_background": "#202020",
+    "pure_black": "#000000",
+}
+
+# Derived colors: (name, source, transforms applied from left to right). Sources
+# are "accent" or palette indices ("00" to "14").
+DERIVED_COLORS = (
+    # accent
+    ("deep_accent", "accent", deepen),
+    ("highlighted_deep_accent", "accent", deepen, soften),
+    ("dimmed_accent", "accent", dim),
+    ("vivid_accent", "accent", vividify),
+
+    # terminal
+    ("ansi_bright_red", "00", deepen, soften),
+    ("ansi_bright_yellow", "03", deepen, soften),
+    ("ansi_bright_green", "06", deepen, soften),
+    ("ansi_bright_cyan", "08", deepen, soften),
+    ("ansi_bright_blue", "09", deepen, soften),
+    ("ansi_bright_magenta", "13", deepen, soften),
+    ("ansi_red", "00", deepen),
+    ("ansi_yellow", "03", deepen),
+    ("ansi_green", "06", deepen),
+    ("ansi_cyan", "08", deepen),
+    ("ansi_blue", "09", deepen),
+    ("ansi_magenta", "13", deepen),
+
+    # source control graph
+    ("gitgraph_1", "06", saturate),
+    ("gitgraph_2", "03", saturate),
+    ("gitgraph_3", "00", saturate),
+    ("gitgraph_4", "08", saturate),
+    ("gitgraph_5", "13", saturate),
+    ("gitgraph_ref", "10", saturate),
+    ("gitgraph_remoteref", "12"),
+    ("gitgraph_baseref", "01", deepen),
+    ("gitgraph_additions", "05", soften),
+    ("gitgraph_deletions", "00", soften),
+
+    # editor error/warning/info squiggly underlines
+    ("underlined_error", "00", saturate),
+    ("underlined_warning", "03", saturate),
+    ("underlined_info", "10", saturate),
+
+    # minimap error/warning/info
+    ("minimap_error", "00", deepen, soften),
+    ("minimap_warning", "03", deepen, soften),
+    ("minimap_info", "10", deepen, soften),
+
+    # explorer/tab filenames
+    ("file_error", "00", vividify),
+    ("file_warning", "03", vividify),
+    ("file_modified", "09", vividify),
+    ("file_added", "05", vividify),
+    ("file_untracked", "01", vividify),
+    ("file_renamed", "08", vividify),
+
+    # editor gutter
+    ("editorgutter_added", "05", dim, soften),
+    ("editorgutter_modified", "09", dim, soften),
+    ("editorgutter_deleted", "00", dim, soften),
+
+    # diff
+    ("diff_inserted", "05", dim),
+    ("diff_removed", "00", dim),
+
+    # merge
+    ("merge_current", "01", dim),
+    ("merge_current_header", "01", vividify),
+    ("merge_incoming", "08", dim),
+    ("merge_incoming_header", "08", vividify),
+    ("merge_editor_change", "14", dim),
+    ("merge_editor_change_word", "14"),
+
+    # match highlights
+    ("word_highlight_strong", "09", deepen),
+    ("findmatch", "06", deepen, soften),
+    ("repeating_selection", "06", dim),
+
+    # miscellaneous
+    ("fold_background", "09", dim),
+    ("breakpoint_foreground", "01", deepen),
+)
+
+
+def statusbar_overlay(background, target):
+    """Return white with the alpha that blends over `background` into `target`."""
+    return deopacify(color="#ffffff", background=background, target=target)
+
+
+def color_names(palette) -> list[str]:
+    """Return the names of the template colors (placeholders without the dollar signs)."""
+    return [*(f"{i:02}" for i in range(len(palette))), "accent", *ACHROMATIC_COLORS,
+            *(name for name, *_ in DERIVED_COLORS), "transparent_statusbar_foreground"]
+
+
+@functools.cache
+def get_color_graph(palette: tuple[str, ...]) -> DerivationGraph:
+    """Create the derivation graph of the template colors for a palette.
+
+    Colors are derived as `Color`s and formatted to hex notation once, by
+    the placeholder nodes ("$name$"). The graph is shared between calls, so
+    only the colors that depend on a changed input (e.g. the accent) are
+    recomputed.
+    """
+    graph = DerivationGraph()
+    for i, color in enumerate(palette):
+        graph.set(f"{i:02}", Color.from_hex(color))
+    for name, color in ACHROMATIC_COLORS.items():
+        graph.set(name, Color.from_hex(color))
+    for name, source, *transforms in DERIVED_COLORS:
+        node = source
+        for transform in transforms:
+            node = graph.apply(transform, node)
+        graph.alias(name, node)
+    graph.derive("transparent_statusbar_foreground", statusbar_overlay,
+                 "sidebar_background", "opaque_statusbar_foreground")
+    for name in color_names(palette):
+        graph.derive(f"${name}$", str, name)
+    return graph
+
+
+def compute_color_map(accent_color, palette=None):
+    """Compute the template colors for the given accent color.
+
+    The accent color is either an index into the palette or a color in hex
+    notation.
+    """
+    palette = get_base_chromatic_palette() if palette is None else tuple(palette)
+    graph = get_color_graph(palette)
+    accent = palette[accent_color] if isinstance(accent_color, int) else accent_color
+    graph.set("accent", Color.from_hex(accent))
+    return graph.evaluate(f"${name}$" for name in color_names(palette))
+
+
+@functools.cache
+def load_template() -> CompiledTemplate:
+    """Load and compile the theme template."""
+    keys = {f"${name}$" for name in color_names(get_base_chromatic_palette())} | {"$variant$"}
+    with profiling.stage("template_loading"):
+        return CompiledTemplate((files(nightstorm)/"template.json").read_text(), keys)
+
+
+def render_theme_variant(accent_color, variant_name, template=None, palette=None):
+    """Render a theme variant with the given accent color (index or hex)."""
+    template = template or load_template()
+    with profiling.scope(variant_name):
+        with profiling.stage("color_map"):
+            color_map = compute_color_map(accent_color, palette)
+        with profiling.stage("substitution"):
+            return template.render(color_map | {"$variant$": variant_name.capitalize()})
+
+
+def theme_path(variant_name, output_dir) -> Path:
+    """Return the path of a theme variant file."""
+    return output_dir/f"Nightstorm-{variant_name}.json"
+
+
+def write_theme_variant(content, variant_name, output_dir):
+    """Write a rendered theme variant into the output directory."""
+    data = content.encode()
+    with profiling.scope(variant_name), profiling.stage("write"):
+        atomic_write(theme_path(variant_name, output_dir), data)
+        profiling.add_bytes(len(data))
+
+
+def generate_theme_variant(accent_color, variant_name, output_dir, template=None):
+    """Generate a theme variant with the given accent color (index or hex)."""
+    content = render_theme_variant(accent_color, variant_name, template)
+    write_theme_variant(content, variant_name, output_dir)
+
+
+def variant_digest(accent_color, variant_name, palette=None) -> str:
+    """Return a digest of everything a theme variant is generated from."""
+    return digest(
+        source_digest("color_manipulation", "generate_themes", "templating"),
+        (files(nightstorm)/"template.json").read_bytes(),
+        variant_name,
+        json.dumps(compute_color_map(accent_color, palette)),
     )
 
-    # Replace.
-    content = (files(nightstorm)/"template.json").read_text()
-    translation_map = color_map | {"$variant$": variant_name.capitalize()}
-    pattern = re.compile("|".join(map(re.escape, translation_map.keys())))  # safely match any key
-    content = pattern.sub(lambda match: translation_map[match.group(0)], content)
 
-    # Save.
-    (output_dir/f"Nightstorm-{variant_name}.json").write_text(content, newline="\n")
+@contextlib.contextmanager
+def profiled():
+    """Profile theme generation, counting oklab_adjust and deopacify calls."""
+    with profiling.Profile() as profile, \
+            profile.count_calls(sys.modules[__name__], "oklab_adjust", "deopacify"):
+        yield profile
+
+
+_worker_state = {}
+
+
+def _init_worker(template, palette, profile):
+    profiling.reset()
+    _worker_state.update(template=template, palette=palette, profile=profile)
+
+
+def _render_in_worker(variant):
+    variant_name, accent_color = variant
+    template, palette = _worker_state["template"], _worker_state["palette"]
+    if not _worker_state["profile"]:
+        return render_theme_variant(accent_color, variant_name, template, palette), None
+    with profiled() as profile:
+        content = render_theme_variant(accent_color, variant_name, template, palette)
+    return content, profile.report()
+
+
+def _render_theme_variants(variants, template, palette, jobs):
+    if jobs == 1:
+        for variant_name, accent_color in variants:
+            yield render_theme_variant(accent_color, variant_name, template, palette)
+        return
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    profile = profiling.active()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(template, palette, profile is not None)) as executor:
+        for content, records in executor.map(_render_in_worker, variants):
+            if profile is not None:
+                profile.merge(records)
+            yield content
+
+
+def generate_theme_variants(variants, output_dir, jobs=1, incremental=False):
+    """Generate theme variants, rendering them in `jobs` processes.
+
+    The palette and the compiled template are prepared once and shared with
+    the workers. Files are written by the calling process in the order of
+    `variants`, so the output does not depend on completion order. In
+    incremental mode, only variants whose inputs changed since the last
+    build (according to the manifest in `output_dir`) are rendered, and
+    files whose content did not change are left untouched.
+    """
+    palette = get_base_chromatic_palette()
+    manifest = None
+    if incremental:
+        manifest = Manifest(output_dir)
+        with profiling.stage("digest"):
+            digests = {variant_name: variant_digest(accent_color, variant_name, palette)
+                       for variant_name, accent_color in variants}
+        variants = [
+            (variant_name, accent_color) for variant_name, accent_color in variants
+            if not manifest.is_up_to_date(theme_path(variant_name, output_dir),
+                                          digests[variant_name])
+        ]
+        if not variants:
+            return
+
+    contents = _render_theme_variants(variants, load_template(), palette, jobs)
+    for (variant_name, _), content in zip(variants, contents):
+        if manifest is None:
+            write_theme_variant(content, variant_name, output_dir)
+        else:
+            data = content.encode()
+            with profiling.scope(variant_name), profiling.stage("write"):
+                if manifest.write(theme_path(variant_name, output_dir), data,
+                                  digests[variant_name]):
+                    profiling.add_bytes(len(data))
+    if manifest is not None:
+        manifest.save()
+
+
+def job_count(value: str) -> int:
+    """Parse a non-negative number of jobs argument (0 for one per CPU)."""
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"invalid job count {value!r} (expected 0 or more)")
+    return jobs
 
 
 def main():
@@ -157,19 +376,86 @@ def main():
         type=Path,
         help="output directory (default: %(default)s)",
     )
+    parser.add_argument(
+        "--check-template",
+        action="store_true",
+        help="report unknown placeholders and unused keys of the template and exit",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        default=1,
+        type=job_count,
+        help="number of processes to render variants in, 0 for one per CPU "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only regenerate variants whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "--export-graph",
+        type=Path,
+        metavar="GRAPH",
+        help="write the color derivation graph as JSON (or Graphviz DOT for a .dot "
+             "suffix) and exit",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and regenerate affected variants when the template or "
+             "the generator changes",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="REPORT",
+        help="write per-stage timings, call counts and bytes written as JSON "
+             "('-' for stdout)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        metavar="STATS",
+        help="write cProfile statistics of the build",
+    )
     args = parser.parse_args()
+    if args.check_template:
+        report = load_template().report()
+        if report:
+            print(report)
+        return
+    if args.export_graph:
+        graph = get_color_graph(get_base_chromatic_palette())
+        compute_color_map(0)  # set the accent
+        if args.export_graph.suffix == ".dot":
+            args.export_graph.write_text(graph.to_dot())
+        else:
+            args.export_graph.write_text(json.dumps(graph.export(), indent=4) + "\n")
+        return
     output_dir = args.output_dir
     output_dir.mkdir(parents=True, exist_ok=True)
+    if args.watch:
+        from nightstorm.watch import Watcher  # pylint: disable=import-outside-toplevel
+        Watcher(output_dir, VARIANTS).run()
+        return
 
-    variants = (
-        ("orange", 2),
-        ("turquoise", 7),
-        ("cyan", 8),
-        ("blue", 10),
-        ("magenta", 13),
-    )
-    for variant_name, accent_color in variants:
-        generate_theme_variant(accent_color, variant_name, output_dir)
+    with contextlib.ExitStack() as stack:
+        profile = stack.enter_context(profiled()) if args.profile else None
+        if args.cprofile:
+            import cProfile  # pylint: disable=import-outside-toplevel
+            profiler = stack.enter_context(cProfile.Profile())
+            stack.callback(profiler.dump_stats, args.cprofile)
+        with profiling.stage("total"):
+            generate_theme_variants(VARIANTS, output_dir, jobs=args.jobs or os.cpu_count(),
+                                    incremental=args.incremental)
+
+    if profile is not None:
+        report = json.dumps(profile.report(), indent=4)
+        if str(args.profile) == "-":
+            print(report)
+        else:
+            args.profile.write_text(report + "\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+"""Import of third-party themes by remapping their colors to Nightstorm colors.
+
+Every color literal of a theme is replaced by the perceptually nearest (in
+Oklab) palette color, single-transform derivative of a palette color or
+achromatic color, keeping its alpha. Themes are processed line by line in
+two passes: the distinct literals of all themes are collected and matched
+in one batch, then the themes are rewritten with their comments and
+formatting intact. Literals are whole JSON strings; comments (in JSONC
+themes) are left untouched.
+"""
+
+import argparse
+import collections
+import json
+import re
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+import numpy as np
+from nightstorm import vectorized
+from nightstorm.color_manipulation import normalize_hex
+from nightstorm.generate_themes import ACHROMATIC_COLORS, ADJUSTMENTS, get_base_chromatic_palette
+
+COLOR_LITERAL = re.compile(r"#(?:[0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3,4})")
+# A JSON string, a line comment, a block comment or the start of one spanning lines.
+TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|//.*|/\*.*?\*/|/\*')
+CHUNK_SIZE = 4096
+
+
+def candidate_colors(palette=None) -> dict[str, str]:
+    """Return the colors that imported colors are remapped to, by name."""
+    palette = list(get_base_chromatic_palette() if palette is None else palette)
+    colors = {f"{i:02}": color for i, color in enumerate(palette)}
+    lab = vectorized.linear_rgb_to_oklab(vectorized.hex_to_linear_rgb(palette))
+    for transform, factors in ADJUSTMENTS.items():
+        adjusted = vectorized.rgba_to_hex(vectorized.srgb_nonlinear_transform(
+            vectorized.adjusted_linear_rgb(lab, *factors)))
+        colors.update((f"{transform}({i:02})", str(color)) for i, color in enumerate(adjusted))
+    colors.update(ACHROMATIC_COLORS)
+    return colors
+
+
+def split_alpha(literal: str) -> tuple[str, str]:
+    """Split a #rgb[a] or #rrggbb[aa] literal into #rrggbb and the alpha digits."""
+    color = normalize_hex(literal)
+    return color[:7], color[7:]
+
+
+class Replacement(NamedTuple):
+    """The Nightstorm color replacing a color literal."""
+    name: str
+    color: str  # in hex notation, with the alpha of the literal
+    distance: float
+
+
+class ColorIndex:
+    """Nearest-neighbor search among named colors in Oklab.
+
+    Queries are answered in chunks by computing all query × color distances
+    at once, which beats a spatial tree for the ~100 indexed colors.
+    """
+
+    def __init__(self, colors: dict[str, str]):
+        self.names = list(colors)
+        self.colors = list(colors.values())
+        self.lab = vectorized.linear_rgb_to_oklab(vectorized.hex_to_linear_rgb(self.colors))
+
+    def query(self, colors) -> tuple[np.ndarray, np.ndarray]:
+        """Return the indices of the nearest colors and the Oklab distances to them."""
+        lab = vectorized.linear_rgb_to_oklab(vectorized.hex_to_linear_rgb(colors)).reshape(-1, 3)
+        indices = np.empty(len(lab), dtype=np.intp)
+        distances = np.empty(len(lab))
+        for start in range(0, len(lab), CHUNK_SIZE):
+            chunk = lab[start:start + CHUNK_SIZE]
+            squared = ((chunk[:, np.newaxis, :] - self.lab[np.newaxis, :, :])**2).sum(-1)
+            nearest = squared.argmin(axis=-1)
+            indices[start:start + len(chunk)] = nearest
+            distances[start:start + len(chunk)] = np.sqrt(squared[np.arange(len(chunk)), nearest])
+        return indices, distances
+
+    def replacements(self, literals: Iterable[str]) -> dict[str, Replacement]:
+        """Find the replacements of color literals in one batch."""
+        literals = list(literals)
+        if not literals:
+            return {}
+        rgb, alphas = zip(*map(split_alpha, literals))
+        indices, distances = self.query(list(rgb))
+        return {
+            literal: Replacement(self.names[i], self.colors[i] + alpha, distance)
+            for literal, alpha, i, distance in zip(literals, alphas, indices.tolist(),
+                                                    distances.tolist())
+        }
+
+
+def _color_literals(lines: Iterable[str]) -> Iterator[tuple[str, list[tuple[int, int]]]]:
+    """Yield theme lines with the spans of their color literals outside comments."""
+    in_comment = False
+    for line in lines:
+        spans = []
+        position = 0
+        if in_comment:
+            end = line.find("*/")
+            if end < 0:
+                yield line, spans
+                continue
+            in_comment, position = False, end + 2
+        for match in TOKEN.finditer(line, position):
+            if match.group(0) == "/*":
+                in_comment = True
+                break
+            if match.group(0).startswith('"') \
+                    and COLOR_LITERAL.fullmatch(line, match.start() + 1, match.end() - 1):
+                spans.append((match.start() + 1, match.end() - 1))
+        yield line, spans
+
+
+def scan(lines: Iterable[str]) -> collections.Counter:
+    """Count the color literals of theme lines."""
+    counts = collections.Counter()
+    for line, spans in _color_literals(lines):
+        counts.update(line[start:end] for start, end in spans)
+    return counts
+
+
+def remap_lines(lines: Iterable[str], remapping: dict[str, Replacement]) -> Iterator[str]:
+    """Replace the color literals of theme lines."""
+    for line, spans in _color_literals(lines):
+        parts, position = [], 0
+        for start, end in spans:
+            parts += [line[position:start], remapping[line[start:end]].color]
+            position = end
+        yield "".join(parts) + line[position:]
+
+
+def output_names(paths: Iterable[Path]) -> list[str]:
+    """Return distinct output file names for themes, numbering repeated names."""
+    names = []
+    for path in paths:
+        name, number = path.name, 1
+        while name in names:
+            number += 1
+            name = f"{path.stem}-{number}{path.suffix}"
+        names.append(name)
+    return names
+
+
+def import_themes(paths: Iterable[Path], output_dir: Path, index=None) -> dict[str, list[dict]]:
+    """Write remapped themes into a directory and return a report per theme.
+
+    Themes are written and reported under their file names, numbered if
+    several share one. Report entries are sorted by decreasing distance.
+    """
+    paths = list(paths)
+    index = index or ColorIndex(candidate_colors())
+    counts = {}
+    for path in paths:
+        with path.open(encoding="utf-8") as lines:
+            counts[path] = scan(lines)
+    remapping = index.replacements(set().union(*counts.values()))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report = {}
+    for path, name in zip(paths, output_names(paths)):
+        with path.open(encoding="utf-8") as lines, \
+                (output_dir/name).open("w", encoding="utf-8") as output:
+            output.writelines(remap_lines(lines, remapping))
+        report[name] = sorted((
+            {"color": literal, "count": count, "name": remapping[literal].name,
+             "replacement": remapping[literal].color, "distance": remapping[literal].distance}
+            for literal, count in counts[path].items()
+        ), key=lambda entry: -entry["distance"])
+    return report
+
+
+def format_report(report: dict[str, list[dict]]) -> str:
+    """Format the remapped colors per theme as text."""
+    lines = []
+    for name, entries in report.items():
+        total = sum(entry["count"] for entry in entries)
+        lines.append(f"{name}: {len(entries)} colors ({total} literals)")
+        for entry in entries:
+            lines.append(f"    {entry['color']:>9} x{entry['count']:<4} -> "
+                         f"{entry['replacement']:<9} {entry['name']:<24} "
+                         f"ΔE {entry['distance']:.4f}")
+    return "\n".join(lines)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="theme files",
+    )
+    parser.add_argument(
+        "-o", "--output-dir",
+        default=Path.cwd()/"imported",
+        type=Path,
+        help="output directory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the report as JSON",
+    )
+    args = parser.parse_args()
+    report = import_themes(args.paths, args.output_dir)
+    print(json.dumps(report, indent=4) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Incremental builds."""
+
+import hashlib
+import json
+import os
+import tempfile
+from importlib.resources import files
+from pathlib import Path
+import nightstorm
+
+MANIFEST_NAME = ".nightstorm-manifest.json"
+
+
+def digest(*parts) -> str:
+    """Return a SHA-256 hex digest of strings and bytes."""
+    hasher = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode()
+        hasher.update(len(data).to_bytes(8, "little"))
+        hasher.update(data)
+    return hasher.hexdigest()
+
+
+def source_digest(*module_names) -> str:
+    """Return a digest of the source code of nightstorm modules."""
+    return digest(*((files(nightstorm)/f"{name}.py").read_bytes() for name in module_names))
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write a file by replacing it with a fully written temporary file."""
+    fd, temporary_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as temporary_file:
+            temporary_file.write(data)
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Atomically write a file unless it already has the given content."""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    atomic_write(path, data)
+    return True
+
+
+class Manifest:
+    """Input digests of the outputs in a directory.
+
+    An output is up to date when the digest of its inputs matches the
+    recorded one and the file still has the recorded content.
+    """
+
+    def __init__(self, directory: Path):
+        self.path = directory/MANIFEST_NAME
+        try:
+            self.entries = json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+        self._changed = False
+
+    def is_up_to_date(self, output: Path, input_digest: str) -> bool:
+        """Check whether an output was built from the given inputs."""
+        entry = self.entries.get(output.name)
+        if entry is None or entry["inputs"] != input_digest:
+            return False
+        try:
+            return digest(output.read_bytes()) == entry["output"]
+        except FileNotFoundError:
+            return False
+
+    def write(self, output: Path, data: bytes, input_digest: str) -> bool:
+        """Write an output (if its content changed) and record its inputs."""
+        written = write_if_changed(output, data)
+        entry = {"inputs": input_digest, "output": digest(data)}
+        if self.entries.get(output.name) != entry:
+            self.entries[output.name] = entry
+            self._changed = True
+        return written
+
+    def save(self):
+        """Save the manifest if any entry changed."""
+        if self._changed:
+            atomic_write(self.path, (json.dumps(self.entries, indent=4, sort_keys=True)
+                                     + "\n").encode())
+            self._changed = False
@@ -0,0 +1,18 @@
+"""JSON with comments (the format of VS Code themes)."""
+
+import json
+import re
+
+_COMMENT = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+_TRAILING_COMMA = re.compile(r'("(?:\\.|[^"\\])*")|,(\s*[}\]])')
+
+
+def strip(text: str) -> str:
+    """Remove comments and trailing commas, keeping string literals intact."""
+    text = _COMMENT.sub(lambda match: match.group(1) or "", text)
+    return _TRAILING_COMMA.sub(lambda match: match.group(1) or match.group(2), text)
+
+
+def loads(text: str):
+    """Parse JSON with comments and trailing commas."""
+    return json.loads(strip(text))
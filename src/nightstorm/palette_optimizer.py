@@ -0,0 +1,198 @@
+"""Palette optimization for perceptual separation.
+
+A candidate palette is given by the lightness factor, chroma factor and hue
+offset applied to the base color before it is rotated through the hues, like
+`get_base_chromatic_palette` does with (1, 1, 0). Every chain of transforms
+that the template colors derive from palette entries (e.g. soften ∘ deepen)
+is applied to the whole palette, and the candidate is scored by the smallest
+Oklab distance between two entries of the same chain: the least
+distinguishable pair of, say, ANSI colors. Candidates whose base colors are
+out of the sRGB gamut are rejected.
+"""
+# pylint: disable=invalid-name
+
+import argparse
+import contextlib
+import math
+import os
+import numpy as np
+from nightstorm import gamut, vectorized
+from nightstorm.color_manipulation import hex_to_lch
+from nightstorm.generate_themes import ADJUSTMENTS, BASE_COLOR, DERIVED_COLORS, job_count, n
+
+CHUNK_SIZE = 256
+TOP = 16  # best candidates perturbed in each refinement round
+LIGHTNESS_FACTOR_BOUNDS = (0.8, 1.2)
+CHROMA_FACTOR_BOUNDS = (0.5, 1.5)
+CURRENT = (1.0, 1.0, 0.0)
+
+
+def transform_chains() -> list[tuple[str, ...]]:
+    """Return the transform chains applied to palette entries by the template colors."""
+    chains = {()}
+    for _, source, *transforms in DERIVED_COLORS:
+        if source != "accent":
+            chains.add(tuple(transform.__name__ for transform in transforms))
+    return sorted(chains, key=lambda chain: (len(chain), chain))
+
+
+def bounds(size=n) -> np.ndarray:
+    """Return the lower and upper bounds of the parameters (3×2)."""
+    return np.array([LIGHTNESS_FACTOR_BOUNDS, CHROMA_FACTOR_BOUNDS, (0, 2*math.pi/size)])
+
+
+def palettes(parameters, size=n) -> np.ndarray:
+    """Return the palettes (K×size, hex) of K×3 candidate parameters."""
+    parameters = np.asarray(parameters, dtype=float).reshape(-1, 3)
+    lightness_factor, chroma_factor, hue_offset = (parameters[:, [i]] for i in range(3))
+    hue_addends = hue_offset + np.arange(size)/size*2*math.pi
+    return vectorized.oklab_adjust(np.full(hue_addends.shape, BASE_COLOR),
+                                   lightness_factor, chroma_factor, hue_addends)
+
+
+def in_gamut(parameters, size=n) -> np.ndarray:
+    """Check whether the unclipped base colors of candidates are in the sRGB gamut."""
+    parameters = np.asarray(parameters, dtype=float).reshape(-1, 3)
+    L, C, h = hex_to_lch(BASE_COLOR)
+    hues = h + parameters[:, [2]] + np.arange(size)/size*2*math.pi
+    lightness = np.broadcast_to(L*parameters[:, [0]], hues.shape)
+    return (C*parameters[:, [1]] <= gamut.max_chroma_array(lightness, hues)).all(axis=-1)
+
+
+def chain_colors(palette, chains) -> np.ndarray:
+    """Apply transform chains to palettes (K×size) and return K×chains×size colors.
+
+    Like the template colors, chains stay in floating point between
+    transforms and are quantized to hex notation once.
+    """
+    results = {(): vectorized.hex_to_linear_rgb(palette)}
+    for chain in chains:
+        for i in range(1, len(chain) + 1):
+            if chain[:i] not in results:
+                results[chain[:i]] = vectorized.adjusted_linear_rgb(
+                    vectorized.linear_rgb_to_oklab(results[chain[:i - 1]]),
+                    *ADJUSTMENTS[chain[i - 1]])
+    rgb = np.stack([results[chain] for chain in chains], axis=1)
+    return vectorized.rgba_to_hex(vectorized.srgb_nonlinear_transform(rgb))
+
+
+def separations(parameters, chains, size=n) -> np.ndarray:
+    """Return the smallest Oklab distance within each chain (K×chains).
+
+    Out-of-gamut candidates get -inf.
+    """
+    colors = chain_colors(palettes(parameters, size), chains)
+    lab = vectorized.linear_rgb_to_oklab(vectorized.hex_to_linear_rgb(colors))
+    distances = np.sqrt(((lab[..., :, np.newaxis, :] - lab[..., np.newaxis, :, :])**2).sum(-1))
+    i, j = np.triu_indices(size, k=1)
+    result = distances[..., i, j].min(axis=-1)
+    result[~in_gamut(parameters, size)] = -np.inf
+    return result
+
+
+def _separations_of_chunk(args):
+    return separations(*args)
+
+
+def process_pool(jobs=1):
+    """Return a process pool for `jobs` processes, or a null context for 1 job."""
+    if jobs == 1:
+        return contextlib.nullcontext()
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    return ProcessPoolExecutor(max_workers=jobs)
+
+
+def evaluate(parameters, chains, size=n, executor=None) -> np.ndarray:
+    """Score candidates by their smallest separation, in an executor if given."""
+    parameters = np.asarray(parameters, dtype=float).reshape(-1, 3)
+    chunks = [(parameters[i:i + CHUNK_SIZE], chains, size)
+              for i in range(0, len(parameters), CHUNK_SIZE)]
+    results = (executor.map if executor else map)(_separations_of_chunk, chunks)
+    return np.concatenate([*results, np.empty((0, len(chains)))]).min(axis=-1)
+
+
+def perturb(parameters, count, scale, rng, size=n) -> np.ndarray:
+    """Return `count`//`TOP` random perturbations of each candidate, within the bounds."""
+    low, high = bounds(size).T
+    steps = rng.normal(0, scale, (len(parameters)*(count//TOP), 3))
+    return np.clip(np.repeat(parameters, count//TOP, axis=0) + steps, low, high)
+
+
+def optimize(count=4096, rounds=3, size=n, jobs=1, seed=0) -> tuple[np.ndarray, np.ndarray]:
+    """Search for the parameters with the largest smallest separation.
+
+    Random candidates are evaluated first. Each refinement round then
+    perturbs the `TOP` best candidates so far, with a step that halves
+    every round. All rounds share one pool of `jobs` processes. Return the
+    parameters and scores sorted from best.
+    """
+    rng = np.random.default_rng(seed)
+    chains = transform_chains()
+    scale = np.ptp(bounds(size), axis=1)/8
+    with process_pool(jobs) as executor:
+        parameters = np.vstack([CURRENT, rng.uniform(*bounds(size).T, (count - 1, 3))])
+        scores = evaluate(parameters, chains, size, executor)
+        for _ in range(rounds):
+            candidates = perturb(parameters[np.argsort(-scores)[:TOP]], count, scale, rng, size)
+            parameters = np.vstack([parameters, candidates])
+            scores = np.concatenate([scores, evaluate(candidates, chains, size, executor)])
+            scale /= 2
+    order = np.argsort(-scores, kind="stable")
+    return parameters[order], scores[order]
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--candidates",
+        default=4096,
+        type=int,
+        help="candidates evaluated per round (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rounds",
+        default=3,
+        type=int,
+        help="refinement rounds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--size",
+        default=n,
+        type=int,
+        help="number of palette colors (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--seed",
+        default=0,
+        type=int,
+        help="random seed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--show",
+        default=5,
+        type=int,
+        help="number of best candidates to show (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        default=1,
+        type=job_count,
+        help="number of processes, 0 for one per CPU (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    chains = transform_chains()
+    current = evaluate([CURRENT], chains, args.size)[0]
+    parameters, scores = optimize(args.candidates, args.rounds, size=args.size,
+                                  jobs=args.jobs or os.cpu_count(), seed=args.seed)
+    print(f"current: smallest ΔE {current:.4f}")
+    for (lightness_factor, chroma_factor, hue_offset), score in \
+            zip(parameters[:args.show], scores[:args.show]):
+        print(f"lightness_factor={lightness_factor:.4f} chroma_factor={chroma_factor:.4f} "
+              f"hue_offset={math.degrees(hue_offset):.2f}°: smallest ΔE {score:.4f}")
+    print(" ".join(palettes(parameters[0], args.size)[0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,6 @@
 """Plotting."""
 
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-import numpy as np
-from nightstorm.generate_themes import base_chromatic_palette
+from nightstorm.generate_themes import get_base_chromatic_palette
 
 hue_names = [
     "red",
@@ -22,12 +19,10 @@ hue_names = [
     "magenta",
     "cerise/rose",
 ]
-data = [
-    ("Base Chromatic Palette", base_chromatic_palette, hue_names),
-]
 
 def plot(ax, title, palette, labels=None):
     """Plot a color palette."""
+    import matplotlib as mpl  # pylint: disable=import-outside-toplevel
     n = len(palette)
     ax.imshow(
         [range(n)],
@@ -40,10 +35,23 @@ def plot(ax, title, palette, labels=None):
     ax.set_yticks([])
     ax.set_title(title)
 
-_, axes = plt.subplots(nrows=len(data), ncols=1, figsize=(8, len(data)*2))
-axes = np.ravel(axes)  # ensure iterability
-for axis, (palette_name, palette_colors, hue_names) in zip(axes, data):
-    plot(ax=axis, title=palette_name, palette=palette_colors, labels=hue_names)
-plt.xlabel("hue names")
-plt.tight_layout()
-plt.show()
+
+def main():
+    """Main function."""
+    # pylint: disable=import-outside-toplevel
+    import matplotlib.pyplot as plt
+    import numpy as np
+    data = [
+        ("Base Chromatic Palette", get_base_chromatic_palette(), hue_names),
+    ]
+    _, axes = plt.subplots(nrows=len(data), ncols=1, figsize=(8, len(data)*2))
+    axes = np.ravel(axes)  # ensure iterability
+    for axis, (palette_name, palette_colors, labels) in zip(axes, data):
+        plot(ax=axis, title=palette_name, palette=palette_colors, labels=labels)
+    plt.xlabel("hue names")
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Build profiling.
+
+Instrumented code marks its stages with `stage(name)` and reports output
+sizes with `add_bytes(n)`. Both are no-ops unless a `Profile` is active,
+so instrumentation costs a global lookup when profiling is disabled.
+"""
+
+import collections
+import contextlib
+import functools
+import time
+
+_active = None  # pylint: disable=invalid-name
+_patches = []  # (namespace, name, original function) replaced by `Profile.count_calls`
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Profile:
+    """Per-scope stage wall times, function call counts and bytes written.
+
+    Measurements are attributed to the current scope (e.g. a theme variant),
+    which is "build" outside of any `scope` block.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.current_scope = "build"
+
+    def record(self, scope_name=None) -> dict:
+        """Return the record of a scope, creating it if needed."""
+        return self.records.setdefault(scope_name or self.current_scope, {
+            "stages": collections.defaultdict(lambda: {"seconds": 0.0, "calls": 0}),
+            "calls": collections.Counter(),
+            "bytes_written": 0,
+        })
+
+    @contextlib.contextmanager
+    def scope(self, name):
+        """Attribute measurements to the named scope."""
+        previous, self.current_scope = self.current_scope, name
+        self.record()
+        try:
+            yield
+        finally:
+            self.current_scope = previous
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Measure the wall time of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.record()["stages"][name]
+            entry["seconds"] += time.perf_counter() - start
+            entry["calls"] += 1
+
+    @contextlib.contextmanager
+    def count_calls(self, namespace, *names):
+        """Count calls of the named functions of a module or class."""
+        originals = {name: getattr(namespace, name) for name in names}
+
+        def counted(name, function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                self.record()["calls"][name] += 1
+                return function(*args, **kwargs)
+            return wrapper
+
+        patches = [(namespace, name, function) for name, function in originals.items()]
+        for name, function in originals.items():
+            setattr(namespace, name, counted(name, function))
+        _patches.extend(patches)
+        try:
+            yield
+        finally:
+            _restore(patches)
+
+    def merge(self, records: dict):
+        """Add records measured elsewhere (e.g. in a worker process)."""
+        for scope_name, other in records.items():
+            record = self.record(scope_name)
+            for name, entry in other["stages"].items():
+                record["stages"][name]["seconds"] += entry["seconds"]
+                record["stages"][name]["calls"] += entry["calls"]
+            record["calls"].update(other["calls"])
+            record["bytes_written"] += other["bytes_written"]
+
+    def report(self) -> dict:
+        """Return the records as plain data (JSON serializable)."""
+        return {
+            scope_name: {
+                "stages": dict(record["stages"]),
+                "calls": dict(record["calls"]),
+                "bytes_written": record["bytes_written"],
+            }
+            for scope_name, record in self.records.items()
+        }
+
+    def __enter__(self):
+        global _active  # pylint: disable=global-statement
+        if _active is not None:
+            raise RuntimeError("A profile is already active.")
+        _active = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active  # pylint: disable=global-statement
+        _active = None
+
+
+def _restore(patches):
+    for patch in reversed(patches):
+        namespace, name, function = patch
+        setattr(namespace, name, function)
+        if patch in _patches:
+            _patches.remove(patch)
+
+
+def reset():
+    """Discard profiling state, e.g. inherited by a forked worker process."""
+    global _active  # pylint: disable=global-statement
+    _active = None
+    _restore(list(_patches))
+
+
+def stage(name):
+    """Measure the wall time of a stage in the active profile, if any."""
+    if _active is None:
+        return _NULL_CONTEXT
+    return _active.stage(name)
+
+
+def scope(name):
+    """Attribute measurements in the active profile, if any, to a scope."""
+    if _active is None:
+        return _NULL_CONTEXT
+    return _active.scope(name)
+
+
+def add_bytes(n):
+    """Record bytes written in the active profile, if any."""
+    if _active is not None:
+        _active.record()["bytes_written"] += n
+
+
+def active() -> Profile | None:
+    """Return the active profile."""
+    return _active
@@ -0,0 +1,55 @@
+"""Template compilation."""
+
+import re
+from collections.abc import Iterable, Mapping
+
+PLACEHOLDER = re.compile(r"\$\w+\$")
+
+
+class CompiledTemplate:
+    """A template parsed into literal segments and placeholder slots.
+
+    The template is scanned once for $placeholder$ tokens. Tokens that are
+    among `keys` become slots, everything else is kept as literal text, so
+    rendering is a single join over the precomputed segments.
+    """
+
+    def __init__(self, text: str, keys: Iterable[str]):
+        keys = set(keys)
+        self.segments = []
+        self.slots = {}  # placeholder -> indices of the segments it fills
+        found = set()
+        literal = []
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            key = match.group(0)
+            found.add(key)
+            if key not in keys:
+                continue
+            literal.append(text[position:match.start()])
+            self.segments.append("".join(literal))
+            self.slots.setdefault(key, []).append(len(self.segments))
+            self.segments.append(key)
+            literal = []
+            position = match.end()
+        literal.append(text[position:])
+        self.segments.append("".join(literal))
+
+        self.unknown_placeholders = found - keys
+        self.unused_keys = keys - found
+
+    def report(self) -> str:
+        """Describe the placeholders and keys that do not match up."""
+        return "\n".join([
+            *(f"unknown placeholder: {key}" for key in sorted(self.unknown_placeholders)),
+            *(f"unused key: {key}" for key in sorted(self.unused_keys)),
+        ])
+
+    def render(self, mapping: Mapping[str, str]) -> str:
+        """Fill the placeholder slots from the mapping."""
+        segments = self.segments.copy()
+        for key, indices in self.slots.items():
+            value = mapping[key]
+            for i in indices:
+                segments[i] = value
+        return "".join(segments)
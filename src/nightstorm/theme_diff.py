@@ -0,0 +1,170 @@
+"""Perceptual diff of two theme builds.
+
+Entries of the themes of both builds are aligned by `colors` key,
+`tokenColors` scope and `semanticTokenColors` selector. The colors of all
+changed entries are composed over their theme's editor background and
+converted to Oklab in one batch, and the changes are reported with their
+ΔE (Euclidean distance in Oklab). Malformed colors are reported as errors
+instead of being measured.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import NamedTuple
+import numpy as np
+from nightstorm import vectorized
+from nightstorm.audit import BASE_BACKGROUND, load_themes
+from nightstorm.color_manipulation import normalize_hex
+
+
+class Change(NamedTuple):
+    """An entry that differs between builds and the backgrounds it is drawn over."""
+    theme: str
+    key: str
+    old: str | None
+    new: str | None
+    old_base: str
+    new_base: str
+
+
+def _color(value):
+    if not (isinstance(value, str) and value.startswith("#")):
+        return None
+    try:
+        return normalize_hex(value)
+    except ValueError:
+        return value  # malformed, reported by `measure`
+
+
+def theme_entries(theme: dict) -> dict[str, str]:
+    """Return the colors of a theme by entry key (in #rrggbb[aa] notation if valid)."""
+    entries = {}
+    for key, value in theme.get("colors", {}).items():
+        entries[key] = _color(value)
+    for i, rule in enumerate(theme.get("tokenColors", [])):
+        scopes = rule.get("scope") or [rule.get("name") or str(i)]
+        scopes = [scopes] if isinstance(scopes, str) else scopes
+        for setting in ("foreground", "background"):
+            color = _color(rule.get("settings", {}).get(setting))
+            if color:
+                for scope in scopes:
+                    entries[f"tokenColors[{scope.strip()}].{setting}"] = color
+    for selector, value in theme.get("semanticTokenColors", {}).items():
+        entries[f"semanticTokenColors[{selector}]"] = _color(
+            value.get("foreground") if isinstance(value, dict) else value)
+    return {key: color for key, color in entries.items() if color}
+
+
+def oklab_as_drawn(colors, bases) -> np.ndarray:
+    """Return the Oklab coordinates of colors composed over opaque base colors."""
+    base_rgba = vectorized.hex_to_rgba(bases)
+    base_rgba[..., 3] = 1
+    rgba = vectorized.mix(vectorized.hex_to_rgba(colors), base_rgba, 0, mode="srgb",
+                          alpha_mode="blend")
+    return vectorized.linear_rgb_to_oklab(vectorized.srgb_nonlinear_transform_inverse(
+        rgba[..., :3]))
+
+
+def align(old_themes: dict[str, dict], new_themes: dict[str, dict]) -> list[Change]:
+    """Return the entries that differ between the themes of two builds, aligned by key."""
+    changes = []
+    for name in {**old_themes, **new_themes}:
+        old = theme_entries(old_themes.get(name, {}))
+        new = theme_entries(new_themes.get(name, {}))
+        old_base = old.get(BASE_BACKGROUND, "#000000")
+        new_base = new.get(BASE_BACKGROUND, "#000000")
+        changes.extend(Change(name, key, old.get(key), new.get(key), old_base, new_base)
+                       for key in {**old, **new} if old.get(key) != new.get(key))
+    return changes
+
+
+def measure(changes: list[Change]) -> list[dict]:
+    """Return the report entries of changes, with their ΔE computed in one batch.
+
+    Entries that only one build defines get a ΔE of None, and so do entries
+    with a malformed color or background, which get an error as well.
+    """
+    entries, measured = [], []
+    for change in changes:
+        entry = {"key": change.key, "old": change.old, "new": change.new, "distance": None}
+        if change.old and change.new:
+            try:
+                measured.append((entry, [normalize_hex(color) for color in change[2:]]))
+            except ValueError as error:
+                entry["error"] = str(error)
+        entries.append(entry)
+    if measured:
+        old, new, old_bases, new_bases = zip(*(colors for _, colors in measured))
+        distances = np.sqrt(((oklab_as_drawn(new, new_bases)
+                              - oklab_as_drawn(old, old_bases))**2).sum(-1))
+        for (entry, _), distance in zip(measured, distances.tolist()):
+            entry["distance"] = distance
+    return entries
+
+
+def diff(old_themes: dict[str, dict], new_themes: dict[str, dict], threshold=0.0) \
+        -> dict[str, list[dict]]:
+    """Return the changed entries per theme, sorted by decreasing ΔE.
+
+    Changes with a ΔE below the threshold are left out. Entries that only
+    one build defines or with a malformed color are listed last, with a ΔE
+    of None.
+    """
+    result = {name: [] for name in {**old_themes, **new_themes}}
+    changes = align(old_themes, new_themes)
+    for change, entry in zip(changes, measure(changes)):
+        if entry["distance"] is None or entry["distance"] >= threshold:
+            result[change.theme].append(entry)
+    for entries in result.values():
+        entries.sort(key=lambda entry: (entry["distance"] is None, -(entry["distance"] or 0)))
+    return result
+
+
+def format_report(changes: dict[str, list[dict]]) -> str:
+    """Format the changed entries per theme as text."""
+    lines = []
+    for name, entries in changes.items():
+        lines.append(f"{name}: {len(entries) or 'no'} changes")
+        for entry in entries:
+            distance = "" if entry["distance"] is None else f"ΔE {entry['distance']:.4f}"
+            distance = entry.get("error", distance)
+            lines.append(f"    {entry['key']:<56} {entry['old'] or '(none)':>9} -> "
+                         f"{entry['new'] or '(none)':<9} {distance}")
+    return "\n".join(lines)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "old",
+        type=Path,
+        help="old build: theme file, directory or archive",
+    )
+    parser.add_argument(
+        "new",
+        type=Path,
+        help="new build: theme file, directory or archive",
+    )
+    parser.add_argument(
+        "--threshold",
+        default=0.0,
+        type=float,
+        help="smallest ΔE to report (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the changes as JSON",
+    )
+    args = parser.parse_args()
+    changes = diff(dict(load_themes([args.old])), dict(load_themes([args.new])), args.threshold)
+    print(json.dumps(changes, indent=4) if args.json else format_report(changes))
+    if any(changes.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Vectorized color manipulation.
+
+Batch counterparts of the functions in `nightstorm.color_manipulation`.
+Coordinates are NumPy arrays with the channels on the last axis (N×3 or
+N×4), and colors in hex notation may be given either as an array of
+#rrggbb[aa] strings or as packed 0xRRGGBBAA integers. The arithmetic
+mirrors the scalar functions operation by operation, so the results agree
+with them after hex quantization.
+"""
+# pylint: disable=invalid-name
+
+from typing import NamedTuple
+import numpy as np
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_HEX_VALUES = np.array([int(chr(code), 16) if chr(code) in "0123456789abcdefABCDEF" else 255
+                        for code in range(256)], dtype=np.uint8)
+
+# Linear RGB by 8-bit sRGB value, computed with Python floats like
+# `color_manipulation.LINEAR_BY_BYTE` (NumPy's vectorized power may differ
+# in the last bit).
+_LINEAR_BY_BYTE = np.array([((x/255 + 0.055)/(1 + 0.055))**2.4 if x/255 >= 0.04045
+                            else x/255/12.92 for x in range(256)])
+
+
+def cbrt(x):
+    """Return the cube root of x."""
+    return np.copysign(np.abs(x)**(1/3), x)
+
+
+def _dot3(matrix, x):
+    """Multiply each 3-vector on the last axis of x by a 3×3 matrix."""
+    x0, x1, x2 = x[..., 0], x[..., 1], x[..., 2]
+    return np.stack([m0*x0 + m1*x1 + m2*x2 for m0, m1, m2 in matrix], axis=-1)
+
+
+_LINEAR_RGB_TO_LMS = (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+)
+_LMS_TO_OKLAB = (
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+)
+_OKLAB_TO_LMS = (
+    (1, 0.3963377774, 0.2158037573),
+    (1, -0.1055613458, -0.0638541728),
+    (1, -0.0894841775, -1.2914855480),
+)
+_LMS_TO_LINEAR_RGB = (
+    (+4.0767416621, -3.3077115913, 0.2309699292),
+    (-1.2684380046, 2.6097574011, -0.3413193965),
+    (-0.0041960863, -0.7034186147, 1.7076147010),
+)
+
+
+def linear_rgb_to_oklab(rgb):
+    """Convert from linear RGB to Oklab."""
+    return _dot3(_LMS_TO_OKLAB, cbrt(_dot3(_LINEAR_RGB_TO_LMS, rgb)))
+
+
+def oklab_to_linear_rgb(lab):
+    """Convert from Oklab to linear RGB."""
+    lms = _dot3(_OKLAB_TO_LMS, lab)
+    return _dot3(_LMS_TO_LINEAR_RGB, lms*lms*lms)
+
+
+def srgb_nonlinear_transform(x):
+    """Convert coordinates from linear RGB to sRGB."""
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid="ignore"):
+        y = np.where(x >= 0.0031308, (1.055)*x**(1.0/2.4) - 0.055, 12.92*x)
+    return np.clip(y, 0, 1)
+
+
+def srgb_nonlinear_transform_inverse(x):
+    """Convert coordinates from sRGB to linear RGB."""
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.where(x >= 0.04045, ((x + 0.055)/(1 + 0.055))**2.4, x/12.92)
+
+
+def lab_to_lch(lab):
+    """Convert from Lab-coordinates to polar form."""
+    L, a, b = lab[..., 0], lab[..., 1], lab[..., 2]
+    return np.stack([L, np.sqrt(a**2 + b**2), np.arctan2(b, a)], axis=-1)
+
+
+def lch_to_lab(lch):
+    """Convert from polar form to Lab-coordinates."""
+    L, C, h = lch[..., 0], lch[..., 1], lch[..., 2]
+    return np.stack([L, C*np.cos(h), C*np.sin(h)], axis=-1)
+
+
+def hex_to_packed(colors) -> np.ndarray:
+    """Convert from #rrggbb[aa] notation to packed 0xRRGGBBAA integers."""
+    colors = np.asarray(colors)
+    if colors.dtype.kind in "iu" or colors.size == 0:
+        return colors.astype(np.uint32)
+    if (np.char.str_len(colors) > 9).any():
+        raise ValueError("Invalid hex color.")
+    codes = np.ascontiguousarray(colors, dtype="U9")
+    codes = codes.reshape(-1).view(np.uint32).reshape(*colors.shape, 9)
+    if (codes[..., 0] != ord("#")).any() or (codes[..., 6] == 0).any() \
+            or ((codes[..., 7] == 0) != (codes[..., 8] == 0)).any():
+        raise ValueError("Invalid hex color.")
+    # Pad #rrggbb to #rrggbbff and decode the digits with a lookup table.
+    codes = np.where(codes == 0, ord("f"), np.minimum(codes, 255))
+    digits = _HEX_VALUES[codes[..., 1:]]
+    if (digits == 255).any():
+        raise ValueError("Invalid hex color.")
+    packed = np.zeros(colors.shape, dtype=np.uint32)
+    for i in range(8):
+        packed = (packed << 4) | digits[..., i]
+    return packed
+
+
+def packed_to_hex(packed, alpha=True) -> np.ndarray:
+    """Convert from packed 0xRRGGBBAA integers to #rrggbb[aa] notation."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    n_digits = 8 if alpha else 6
+    shifts = np.arange(28, 28 - 4*n_digits, -4, dtype=np.uint32)
+    chars = np.empty((*packed.shape, 1 + n_digits), dtype=np.uint8)
+    chars[..., 0] = ord("#")
+    chars[..., 1:] = _HEX_DIGITS[(packed[..., np.newaxis] >> shifts) & 0xF]
+    return chars.view(f"S{1 + n_digits}")[..., 0].astype(str)
+
+
+def packed_to_bytes(packed) -> np.ndarray:
+    """Split packed 0xRRGGBBAA integers into N×4 8-bit channels."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    shifts = np.array([24, 16, 8, 0], dtype=np.uint32)
+    return ((packed[..., np.newaxis] >> shifts) & 0xFF).astype(np.uint8)
+
+
+def bytes_to_packed(channels) -> np.ndarray:
+    """Join N×3 or N×4 8-bit channels into packed 0xRRGGBBAA integers."""
+    channels = np.asarray(channels, dtype=np.uint32)
+    if channels.shape[-1] == 3:
+        channels = np.concatenate(
+            [channels, np.full((*channels.shape[:-1], 1), 0xFF, dtype=np.uint32)], axis=-1)
+    return (channels[..., 0] << 24) | (channels[..., 1] << 16) | (channels[..., 2] << 8) \
+        | channels[..., 3]
+
+
+def hex_to_rgba(colors) -> np.ndarray:
+    """Convert from #rrggbb[aa] notation to RGBA coordinates."""
+    return packed_to_bytes(hex_to_packed(colors))/255
+
+
+def rgba_to_bytes(coordinates) -> np.ndarray:
+    """Quantize coordinates between 0 and 1 to 8-bit channels."""
+    return np.rint(np.asarray(coordinates)*255).astype(np.uint8)
+
+
+def rgba_to_hex(coordinates) -> np.ndarray:
+    """Convert from coordinates between 0 and 1 to hex notation."""
+    channels = rgba_to_bytes(coordinates)
+    if channels.ndim == 1 and channels.size == 0:
+        return np.empty(0, dtype=str)
+    return packed_to_hex(bytes_to_packed(channels), alpha=channels.shape[-1] == 4)
+
+
+def hex_to_linear_rgb(colors) -> np.ndarray:
+    """Convert from hex notation to linear RGB coordinates."""
+    return _LINEAR_BY_BYTE[packed_to_bytes(hex_to_packed(colors))[..., :3]]
+
+
+def hex_to_lch(colors) -> np.ndarray:
+    """Convert from hex notation to LCh-coordinates."""
+    return lab_to_lch(linear_rgb_to_oklab(hex_to_linear_rgb(colors)))
+
+
+def lch_to_hex(lch) -> np.ndarray:
+    """Convert from LCh-coordinates to hex notation."""
+    return rgba_to_hex(srgb_nonlinear_transform(oklab_to_linear_rgb(lch_to_lab(lch))))
+
+
+def adjusted_linear_rgb(lab, lightness_factor=1, chroma_factor=1, hue_addend=0,
+                        gamut_mapping="clip") -> np.ndarray:
+    """Adjust the lightness, chroma and/or hue of Oklab coordinates.
+
+    Return the linear RGB coordinates of the results, clipped to the sRGB
+    gamut but not quantized, so that chains of adjustments (as with
+    `Color`s) are quantized once at the end.
+    """
+    L, C, h = np.moveaxis(lab_to_lch(lab), -1, 0)
+    L_adjusted = np.maximum(0, L * lightness_factor)
+    C_adjusted = np.maximum(0, C * chroma_factor)
+    h_adjusted = h + hue_addend
+    lch = np.stack(np.broadcast_arrays(L_adjusted, C_adjusted, h_adjusted), axis=-1)
+    if gamut_mapping == "chroma":
+        from nightstorm import gamut  # pylint: disable=import-outside-toplevel,cyclic-import
+        lch = gamut.map_lch_array(lch)
+    elif gamut_mapping != "clip":
+        raise ValueError("Invalid gamut mapping.")
+    return np.clip(oklab_to_linear_rgb(lch_to_lab(lch)), 0, 1)
+
+
+def oklab_adjust(colors, lightness_factor=1, chroma_factor=1, hue_addend=0,
+                 gamut_mapping="clip") -> np.ndarray:
+    """Adjust lightness, chroma and/or hue."""
+    rgb = adjusted_linear_rgb(linear_rgb_to_oklab(hex_to_linear_rgb(colors)), lightness_factor,
+                              chroma_factor, hue_addend, gamut_mapping)
+    return rgba_to_hex(srgb_nonlinear_transform(rgb))
+
+
+def interpolate(c1, c2, t, gamma=1):
+    """Interpolate color coordinates (with gamma correction)."""
+    return ((1 - t)*c1**gamma + t*c2**gamma)**(1/gamma)
+
+
+def parse_mode(mode: str) -> tuple[str, float]:
+    """Parse a mixing mode into an interpolation space and a gamma."""
+    if mode.startswith("srgb"):
+        return "srgb", float((mode + " 1").split()[1])
+    if mode in ("linear rgb", "oklab"):
+        return mode, 1.0
+    raise ValueError("Invalid mode.")
+
+
+def _mix_alphas(a1, a2, t, alpha_mode):
+    """Return the mixed alphas and the color interpolation parameters."""
+    if alpha_mode == "mix":
+        return interpolate(a1, a2, t), t
+    if alpha_mode == "blend":
+        alpha_a = a1*(1-t)
+        a = 1 - (1 - alpha_a) * (1 - a2)
+        return a, a2*(1 - alpha_a)/a
+    raise ValueError("Invalid alpha mode.")
+
+
+def mix(color1, color2, t, mode="oklab", alpha_mode="mix"):
+    """Mix RGBA coordinates in a perceptual color space or otherwise."""
+    color1 = np.asarray(color1, dtype=float)
+    color2 = np.asarray(color2, dtype=float)
+    rgb1, a1 = color1[..., :3], color1[..., 3]
+    rgb2, a2 = color2[..., :3], color2[..., 3]
+    space, gamma = parse_mode(mode)
+    a, t = _mix_alphas(a1, a2, np.asarray(t, dtype=float), alpha_mode)
+    t = t[..., np.newaxis]
+
+    if space == "srgb":
+        rgb = interpolate(rgb1, rgb2, t, gamma=gamma)
+    elif space == "linear rgb":
+        rgb = interpolate(srgb_nonlinear_transform_inverse(rgb1),
+                          srgb_nonlinear_transform_inverse(rgb2), t)
+        rgb = srgb_nonlinear_transform(rgb)
+    else:
+        lab1 = linear_rgb_to_oklab(srgb_nonlinear_transform_inverse(rgb1))
+        lab2 = linear_rgb_to_oklab(srgb_nonlinear_transform_inverse(rgb2))
+        rgb = srgb_nonlinear_transform(oklab_to_linear_rgb(interpolate(lab1, lab2, t)))
+
+    rgb, a = np.broadcast_arrays(rgb, a[..., np.newaxis])
+    return np.concatenate([rgb, a[..., :1]], axis=-1)
+
+
+class Mixer:
+    """Precompiled mixing along color stops.
+
+    The mode is parsed and the stops (hex notation or RGBA coordinates) are
+    converted into the interpolation space once. A call then mixes at any
+    number of positions between the stops. With two stops at positions 0
+    and 1, the results equal those of `mix(stop1, stop2, t, mode, alpha_mode)`.
+    """
+
+    def __init__(self, stops, mode="oklab", alpha_mode="mix", positions=None):
+        stops = np.asarray(stops)
+        rgba = stops.astype(float) if stops.dtype.kind == "f" else hex_to_rgba(stops)
+        if len(rgba) < 2:
+            raise ValueError("At least two stops are required.")
+        self.positions = (np.linspace(0, 1, len(rgba)) if positions is None
+                          else np.asarray(positions, dtype=float))
+        if self.positions.shape != (len(rgba),) or (np.diff(self.positions) <= 0).any():
+            raise ValueError("Positions must increase and match the stops.")
+        _mix_alphas(rgba[:1, 3], rgba[:1, 3], 0, alpha_mode)  # validate
+        self.alpha_mode = alpha_mode
+        self.space, self.gamma = parse_mode(mode)
+        self.alphas = rgba[:, 3]
+        rgb = rgba[:, :3]
+        if self.space == "srgb":
+            self.coordinates = rgb**self.gamma
+        elif self.space == "linear rgb":
+            self.coordinates = srgb_nonlinear_transform_inverse(rgb)
+        else:
+            self.coordinates = linear_rgb_to_oklab(srgb_nonlinear_transform_inverse(rgb))
+
+    def __call__(self, t) -> np.ndarray:
+        """Return RGBA coordinates mixed at positions t (clamped to the stops)."""
+        t = np.asarray(t, dtype=float)
+        i = np.clip(np.searchsorted(self.positions, t, side="right") - 1,
+                    0, len(self.positions) - 2)
+        t = (np.clip(t, self.positions[0], self.positions[-1]) - self.positions[i]) \
+            / (self.positions[i + 1] - self.positions[i])
+        a, t = _mix_alphas(self.alphas[i], self.alphas[i + 1], t, self.alpha_mode)
+        t = t[..., np.newaxis]
+        mixed = (1 - t)*self.coordinates[i] + t*self.coordinates[i + 1]
+        if self.space == "srgb":
+            rgb = mixed**(1/self.gamma)
+        elif self.space == "linear rgb":
+            rgb = srgb_nonlinear_transform(mixed)
+        else:
+            rgb = srgb_nonlinear_transform(oklab_to_linear_rgb(mixed))
+        return np.concatenate([rgb, a[..., np.newaxis]], axis=-1)
+
+    def hex(self, t, alpha=True) -> list[str]:
+        """Return colors mixed at positions t in hex notation."""
+        rgba = self(t)
+        return rgba_to_hex(rgba if alpha else rgba[..., :3]).tolist()
+
+    def ramp(self, n: int) -> np.ndarray:
+        """Return RGBA coordinates of n evenly spaced colors from the first to the last stop."""
+        return self(np.linspace(self.positions[0], self.positions[-1], n))
+
+
+class Overlays(NamedTuple):
+    """Translucent overlays solved by `deopacify` or `deopacify_search`."""
+    colors: np.ndarray  # foregrounds with alpha in #rrggbbaa notation
+    alphas: np.ndarray
+    residuals: np.ndarray  # RMS sRGB distance of the blended overlay from the target
+    indices: np.ndarray | None = None  # best candidate per item
+
+
+def _solve_alphas(rgb, background_rgb, target_rgb):
+    """Return least-squares alphas and residuals of blending rgb over background_rgb."""
+    difference = rgb - background_rgb
+    norm = (difference**2).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alphas = np.where(norm > 0, (difference*(target_rgb - background_rgb)).sum(axis=-1)/norm, 1)
+    alphas = np.clip(alphas, 0, 1)
+    blended = background_rgb + alphas[..., np.newaxis]*difference
+    residuals = np.sqrt(((blended - target_rgb)**2).mean(axis=-1))
+    return alphas, residuals
+
+
+def deopacify(colors, backgrounds, targets) -> Overlays:
+    """Calculate alphas such that blending `colors` over `backgrounds` results in `targets`.
+
+    Unlike the scalar function, alphas are least-squares fits over the
+    channels (clipped to [0, 1]) and unachievable targets are reported
+    through per-item residuals instead of raising.
+    """
+    rgb = hex_to_rgba(colors)[..., :3]
+    alphas, residuals = _solve_alphas(rgb, hex_to_rgba(backgrounds)[..., :3],
+                                      hex_to_rgba(targets)[..., :3])
+    return Overlays(rgba_to_hex(np.concatenate([rgb, alphas[..., np.newaxis]], axis=-1)),
+                    alphas, residuals)
+
+
+def deopacify_search(candidates, backgrounds, targets) -> Overlays:
+    """Find the candidate foreground whose overlay best reproduces each target."""
+    candidate_rgb = hex_to_rgba(candidates)[..., :3]  # K×3
+    background_rgb = hex_to_rgba(backgrounds)[..., np.newaxis, :3]  # N×1×3
+    target_rgb = hex_to_rgba(targets)[..., np.newaxis, :3]
+    alphas, residuals = _solve_alphas(candidate_rgb, background_rgb, target_rgb)  # N×K
+    indices = residuals.argmin(axis=-1)
+    alphas = np.take_along_axis(alphas, indices[..., np.newaxis], axis=-1)[..., 0]
+    residuals = np.take_along_axis(residuals, indices[..., np.newaxis], axis=-1)[..., 0]
+    rgb = candidate_rgb[indices]
+    return Overlays(rgba_to_hex(np.concatenate([rgb, alphas[..., np.newaxis]], axis=-1)),
+                    alphas, residuals, indices)
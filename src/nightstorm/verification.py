@@ -0,0 +1,106 @@
+"""Exhaustive verification of the vectorized conversions.
+
+All 2^24 8-bit sRGB colors are converted in chunks to LCh-coordinates and
+back (`hex_to_lch` and `lch_to_hex`), and from Oklab to linear RGB and back.
+A color fails if it does not come back as the same hex; the worst Oklab
+round-trip error is reported as well.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import NamedTuple
+import numpy as np
+from nightstorm import vectorized
+from nightstorm.generate_themes import job_count
+
+COLOR_COUNT = 1 << 24
+CHUNK_SIZE = 1 << 18
+
+
+class Verification(NamedTuple):
+    """Colors that failed to round-trip and the worst Oklab round-trip error."""
+    count: int
+    failures: list[str]
+    max_oklab_error: float
+    worst: str | None  # the color with the largest error
+
+
+def verify_chunk(start: int, stop: int) -> Verification:
+    """Verify the colors 0xRRGGBB in [start, stop)."""
+    colors = vectorized.packed_to_hex((np.arange(start, stop, dtype=np.uint32) << 8) | 0xFF,
+                                      alpha=False)
+    lab = vectorized.linear_rgb_to_oklab(vectorized.hex_to_linear_rgb(colors))
+    round_trip = vectorized.lch_to_hex(vectorized.lab_to_lch(lab))
+    errors = np.sqrt(((vectorized.linear_rgb_to_oklab(vectorized.oklab_to_linear_rgb(lab))
+                       - lab)**2).sum(-1))
+    worst = int(errors.argmax()) if len(errors) else None
+    return Verification(
+        count=len(colors),
+        failures=colors[round_trip != colors].tolist(),
+        max_oklab_error=float(errors[worst]) if worst is not None else 0.0,
+        worst=str(colors[worst]) if worst is not None else None,
+    )
+
+
+def _verify_chunk(bounds):
+    return verify_chunk(*bounds)
+
+
+def merge(results) -> Verification:
+    """Combine the verifications of chunks."""
+    count, failures, max_oklab_error, worst = 0, [], 0.0, None
+    for result in results:
+        count += result.count
+        failures.extend(result.failures)
+        if worst is None or result.max_oklab_error > max_oklab_error:
+            max_oklab_error, worst = result.max_oklab_error, result.worst
+    return Verification(count, failures, max_oklab_error, worst)
+
+
+def verify(start=0, stop=COLOR_COUNT, chunk_size=CHUNK_SIZE, jobs=1) -> Verification:
+    """Verify the colors 0xRRGGBB in [start, stop) in chunks, in `jobs` processes."""
+    chunks = [(i, min(i + chunk_size, stop)) for i in range(start, stop, chunk_size)]
+    if jobs == 1:
+        return merge(map(_verify_chunk, chunks))
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return merge(executor.map(_verify_chunk, chunks))
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--chunk-size",
+        default=CHUNK_SIZE,
+        type=int,
+        help="colors per chunk (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--stop",
+        default=COLOR_COUNT,
+        type=lambda value: int(value, 0),
+        help="verify the colors below this 0xRRGGBB value only (default: all)",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        default=0,
+        type=job_count,
+        help="number of processes, 0 for one per CPU (default: %(default)s)",
+    )
+    args = parser.parse_args()
+    start = time.perf_counter()
+    result = verify(stop=args.stop, chunk_size=args.chunk_size, jobs=args.jobs or os.cpu_count())
+    elapsed = time.perf_counter() - start
+    for color in result.failures:
+        print(f"round trip failed: {color}")
+    print(f"{result.count} colors verified in {elapsed:.1f} s: {len(result.failures)} failures, "
+          f"max Oklab round-trip error {result.max_oklab_error:.3g} ({result.worst})")
+    if result.failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Watch mode: regenerate themes when the template or the generator changes."""
+
+import importlib
+import sys
+import time
+import traceback
+from importlib.resources import files
+from pathlib import Path
+import nightstorm
+from nightstorm.incremental import write_if_changed
+
+# Generator modules in dependency order (reloaded in this order).
+MODULES = (
+    "profiling",
+    "color_manipulation",
+    "vectorized",
+    "gamut",
+    "derivation",
+    "templating",
+    "incremental",
+    "generate_themes",
+)
+TEMPLATE = "template.json"
+DEFAULT_INTERVAL = 0.1
+
+
+def watched_paths() -> dict[str, Path]:
+    """Return the watched files by name."""
+    package = Path(str(files(nightstorm)))
+    return {name: package/name for name in (TEMPLATE, *(f"{module}.py" for module in MODULES))}
+
+
+def snapshot(paths: dict[str, Path]) -> dict[str, tuple[int, int] | None]:
+    """Return the modification times and sizes of files (None if missing)."""
+    result = {}
+    for name, path in paths.items():
+        try:
+            stat = path.stat()
+            result[name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            result[name] = None
+    return result
+
+
+def reload_modules():
+    """Reload the imported generator modules."""
+    for module in MODULES:
+        module = sys.modules.get(f"nightstorm.{module}")
+        if module is not None:
+            importlib.reload(module)
+
+
+class Watcher:
+    """Keeps the generator resident and regenerates the variants on changes.
+
+    Any change can affect the rendering of every variant, so all variants
+    are re-rendered (a template fill each). Files are replaced atomically
+    and only if their content changed.
+    """
+
+    def __init__(self, output_dir: Path, variants, interval=DEFAULT_INTERVAL):
+        self.output_dir = output_dir
+        self.variants = variants
+        self.interval = interval
+        self.paths = watched_paths()
+        self.state = snapshot(self.paths)
+
+    def poll(self) -> set[str]:
+        """Return the names of the files changed since the last poll."""
+        state = snapshot(self.paths)
+        changed = {name for name, stat in state.items() if stat != self.state.get(name)}
+        self.state = state
+        return changed
+
+    def rebuild(self, changed=frozenset()) -> list[str]:
+        """Regenerate the variants and return the names of those whose files changed."""
+        generate_themes = importlib.import_module("nightstorm.generate_themes")
+        if changed - {TEMPLATE}:
+            reload_modules()
+            generate_themes = sys.modules["nightstorm.generate_themes"]
+        if TEMPLATE in changed:
+            generate_themes.load_template.cache_clear()
+        template = generate_themes.load_template()
+        palette = generate_themes.get_base_chromatic_palette()
+        written = []
+        for variant_name, accent_color in self.variants:
+            content = generate_themes.render_theme_variant(
+                accent_color, variant_name, template, palette)
+            if write_if_changed(generate_themes.theme_path(variant_name, self.output_dir),
+                                content.encode()):
+                written.append(variant_name)
+        return written
+
+    def run(self):
+        """Build once, then rebuild on changes until interrupted."""
+        self.rebuild()
+        print(f"Watching {', '.join(self.paths)} (Ctrl+C to stop)", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(self.interval)
+                changed = self.poll()
+                if not changed:
+                    continue
+                start = time.perf_counter()
+                try:
+                    written = self.rebuild(changed)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    traceback.print_exc()
+                    continue
+                elapsed = (time.perf_counter() - start)*1000
+                print(f"{', '.join(sorted(changed))} changed: "
+                      f"{', '.join(written) or 'no variants'} written in {elapsed:.0f} ms",
+                      file=sys.stderr)
+        except KeyboardInterrupt:
+            pass
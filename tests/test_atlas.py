@@ -0,0 +1,20 @@
+"""Palette atlas tests."""
+
+import skia
+from nightstorm.atlas import CELL_WIDTH, LABEL_WIDTH, ROW_HEIGHT, render_atlas, to_argb
+from nightstorm.generate_themes import VARIANTS, compute_color_map
+
+
+def test_to_argb():
+    """Test conversion to skia colors."""
+    assert to_argb(["#3074e2", "#ffffff8c"]).tolist() == [0xff3074e2, 0x8cffffff]
+
+
+def test_render_atlas():
+    """Test the atlas dimensions and a swatch color."""
+    image = skia.Image.MakeFromEncoded(render_atlas(VARIANTS[:2]))
+    assert image.width() == LABEL_WIDTH + 2*CELL_WIDTH
+    assert image.height() == ROW_HEIGHT*(len(compute_color_map(0)) + 1)
+    pixels = image.toarray(colorType=skia.kRGBA_8888_ColorType)
+    pixel = pixels[ROW_HEIGHT + 3, LABEL_WIDTH + CELL_WIDTH - 4]
+    assert "#" + bytes(pixel[:3].tolist()).hex() == compute_color_map(0)["$00$"]
@@ -0,0 +1,64 @@
+"""Contrast audit tests."""
+
+import numpy as np
+from nightstorm.audit import (
+    apca_contrast,
+    audit,
+    compose,
+    format_report,
+    generated_themes,
+    wcag_contrast,
+)
+from nightstorm.generate_themes import VARIANTS
+
+
+def test_reference_contrasts():
+    """Test contrasts of black and white against published values."""
+    white, black = np.ones((1, 3)), np.zeros((1, 3))
+    assert np.allclose(wcag_contrast(white, black), 21)
+    assert np.allclose(apca_contrast(black, white), 106.04, atol=0.01)
+    assert np.allclose(apca_contrast(white, black), -107.88, atol=0.01)
+
+
+def test_compose():
+    """Test that translucent colors are composed like `opacify`."""
+    foreground, background = compose(["#ffffff80"], ["#00000000"], ["#808080"])
+    assert np.allclose(background, 128/255)
+    assert np.allclose(foreground, 128/255*1 + (1 - 128/255)*128/255)
+
+
+def test_audit():
+    """Test that failures are reported per variant."""
+    theme = {
+        "colors": {
+            "editor.background": "#202020",
+            "editor.foreground": "#bbbbbb",
+            "button.foreground": "#ffffff",
+            "button.background": "#e0e0e040",
+        },
+        "tokenColors": [{"scope": "comment", "settings": {"foreground": "#404040"}}],
+    }
+    failures = audit([("good", {"colors": theme["colors"]}), ("bad", theme)])
+    assert failures["good"] == []
+    assert [failure["key"] for failure in failures["bad"]] == ["tokenColors[comment]"]
+    assert audit(generated_themes(VARIANTS[:1]), min_wcag=1, min_apca=0) \
+        == {f"Nightstorm-{VARIANTS[0][0]}": []}
+
+
+def test_audit_invalid_colors():
+    """Test that short hex colors are audited and invalid colors reported and skipped."""
+    theme = {
+        "colors": {
+            "editor.background": "#000",
+            "editor.foreground": "#FFF",
+            "button.foreground": "#ggg",
+            "button.background": "#3074e2",
+            "badge.foreground": "#333",
+            "badge.background": "red",
+        },
+    }
+    failures = audit([("theme", theme)])["theme"]
+    assert [(failure["key"], "error" in failure) for failure in failures] == [
+        ("badge.foreground", True), ("button.foreground", True)]
+    assert "'red'" in failures[0]["error"]
+    assert "button.foreground" in format_report({"theme": failures})
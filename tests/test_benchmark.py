@@ -0,0 +1,37 @@
+"""Benchmark comparison tests."""
+
+import json
+import sys
+import pytest
+from nightstorm import benchmark
+
+
+def test_compare(capsys):
+    """Test flagging regressions and improvements against a baseline."""
+    baseline = {"regressed": 1.0, "improved": 1.0, "unchanged": 1.0, "within": 1.0, "unused": 1.0}
+    results = {"regressed": 1.3, "improved": 0.7, "unchanged": 1.0, "within": 1.2, "new": 1.0}
+    assert benchmark.compare(results, baseline) == ["regressed"]
+    lines = dict(line.split(maxsplit=1) for line in capsys.readouterr().out.splitlines())
+    assert "REGRESSION" in lines["regressed"]
+    assert "improvement" in lines["improved"]
+    assert "REGRESSION" not in lines["within"] and "improvement" not in lines["within"]
+    assert "no baseline" in lines["new"]
+    assert "unused" not in lines
+    assert not benchmark.compare(results, baseline, threshold=0.5)
+    assert benchmark.compare(results, baseline, threshold=0.1) == ["regressed", "within"]
+
+
+@pytest.mark.parametrize("seconds, regressed", [(1.3, True), (1.1, False), (None, False)])
+def test_compare_exit_status(tmp_path, monkeypatch, seconds, regressed):
+    """Test that compare exits with status 1 only on regressions."""
+    (tmp_path/"baseline.json").write_text(json.dumps({"results": {"color_map": 1.0}}))
+    results = {"color_map": seconds} if seconds is not None else {"missing": 1.0}
+    monkeypatch.setattr(benchmark, "run", lambda names, repeat: results)
+    monkeypatch.setattr(sys, "argv", ["benchmark", "compare",
+                                      "--baseline", str(tmp_path/"baseline.json")])
+    if regressed:
+        with pytest.raises(SystemExit) as exit_info:
+            benchmark.main()
+        assert exit_info.value.code == 1
+    else:
+        benchmark.main()
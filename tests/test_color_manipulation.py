@@ -4,7 +4,12 @@ import math
 import random
 import pytest
 from nightstorm.color_manipulation import (
+    Color,
+    cache_clear,
+    cache_info,
     deopacify,
+    hex_to_linear_rgb,
+    hex_to_rgba,
     opacify,
     rgba_to_hex,
     srgb_nonlinear_transform,
@@ -12,7 +17,12 @@ from nightstorm.color_manipulation import (
     oklab_to_linear_rgb,
     linear_rgb_to_oklab,
     hex_to_lch,
+    lab_to_lch,
     lch_to_hex,
+    mix,
+    normalize_hex,
+    oklab_adjust,
+    set_cache_size,
 )
 
 
@@ -72,3 +82,74 @@ def test_conversions():
         # hex_to_lch <-> lch_to_hex
         L, C, h = hex_to_lch(xyz_hex)
         assert xyz_hex == lch_to_hex(L, C, h)
+
+
+def test_oklab_adjust_cache():
+    """Test memoization of Oklab adjustments."""
+    cache_clear()
+    first = oklab_adjust("#cc8080", lightness_factor=0.85, chroma_factor=1.9)
+    assert oklab_adjust("#cc8080", 0.85, 1.9) == first
+    assert cache_info()["oklab_adjust"].hits == 1
+    assert cache_info()["oklab_adjust"].misses == 1
+
+    set_cache_size(0)
+    assert oklab_adjust("#cc8080", 0.85, 1.9) == first
+    assert cache_info()["oklab_adjust"].hits == 0
+    set_cache_size()
+    assert cache_info()["oklab_adjust"].maxsize > 0
+
+
+@pytest.mark.parametrize("color", ["#cc8080", "#3074e2", "#20c060", "#808080"])
+def test_chroma_gamut_mapping(color):
+    """Test that chroma reduction keeps lightness and hue of saturated colors."""
+    # pylint: disable=invalid-name
+    L, _, h = hex_to_lch(color)
+    L2, C2, h2 = hex_to_lch(oklab_adjust(color, 1.1, 2.5, gamut_mapping="chroma"))
+    assert math.isclose(L*1.1, L2, abs_tol=5e-3)
+    assert C2 < 1e-3 or math.isclose(h, h2, abs_tol=2e-2)
+
+
+def test_normalize_hex():
+    """Test expanding and validating hex notation."""
+    assert normalize_hex("#FfF") == "#ffffff"
+    assert normalize_hex("#abcd") == "#aabbccdd"
+    assert normalize_hex("#3074E280") == "#3074e280"
+    for invalid in ["#ff", "#fffff", "#fffffff", "#ggg", "fff", "red", None, 255]:
+        with pytest.raises(ValueError):
+            normalize_hex(invalid)
+
+
+def test_hex_lookup_tables():
+    """Test that table-based hex parsing matches direct evaluation."""
+    for x in range(256):
+        color = f"#{x:02x}{255 - x:02x}{x//2:02x}"
+        rgb = [x/255, (255 - x)/255, x//2/255]
+        assert hex_to_rgba(color) == rgb + [1.0]
+        assert hex_to_rgba(color + "80") == rgb + [128/255]
+        assert list(hex_to_linear_rgb(color)) == list(map(srgb_nonlinear_transform_inverse, rgb))
+        assert hex_to_lch(color) == lab_to_lch(*linear_rgb_to_oklab(
+            *map(srgb_nonlinear_transform_inverse, rgb)))
+
+
+def test_color():
+    """Test that colors stay in floating point through chains of operations."""
+    for color in ["#cc8080", "#3074e2", "#000000", "#ffffff", "#ffffff8c"]:
+        assert Color.from_hex(color).hex() == color
+        assert str(oklab_adjust(Color.from_hex(color), 0.85, 1.9))[:7] \
+            == oklab_adjust(color, 0.85, 1.9)
+    assert Color.from_hex("#20202080").alpha == 128/255
+
+    # Chains are not quantized between steps.
+    color = Color.from_hex("#3074e2")
+    adjusted = oklab_adjust(oklab_adjust(color, 0.95, 0.8), 1/0.95, 1/0.8)
+    assert euclidean_distance(adjusted.lch(), color.lch()) < 1e-6
+    assert adjusted == oklab_adjust(oklab_adjust(color, 0.95, 0.8), 1/0.95, 1/0.8)
+
+    mixed = mix(Color.from_hex("#3074e2"), Color.from_hex("#cc8080"), 0.3)
+    assert str(mixed) == rgba_to_hex(mix(hex_to_rgba("#3074e2"), hex_to_rgba("#cc8080"), 0.3)[:3])
+    assert str(mix(hex_to_rgba("#3074e2"), Color.from_hex("#cc8080"), 0.3)) == str(mixed)
+    with pytest.raises(AttributeError):
+        color.L = 0.5  # pylint: disable=invalid-name
+    assert str(opacify(Color.from_hex("#3074e280"), "#202020")) == opacify("#3074e280", "#202020")
+    overlay = deopacify(Color.from_hex("#ffffff"), Color.from_hex("#2c2c2c"), "#a0a0a0")
+    assert str(overlay) == deopacify("#ffffff", "#2c2c2c", "#a0a0a0")
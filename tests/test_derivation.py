@@ -0,0 +1,53 @@
+"""Derivation graph tests."""
+
+import pytest
+from nightstorm.derivation import DerivationGraph
+from nightstorm.generate_themes import (
+    compute_color_map,
+    get_base_chromatic_palette,
+    get_color_graph,
+)
+
+
+def double(value):
+    """Double a value."""
+    return 2*value
+
+
+def test_dirty_propagation():
+    """Test that only dependents of a changed input are recomputed."""
+    graph = DerivationGraph()
+    graph.set("a", 1)
+    graph.set("b", 10)
+    graph.alias("c", graph.apply(double, graph.apply(double, "a")))
+    graph.derive("d", lambda x, y: x + y, "c", "b")
+    assert graph.evaluate(["c", "d"]) == {"c": 4, "d": 14}
+    assert graph.evaluations == 4
+    assert graph.apply(double, "a") == "double(a)"
+    assert graph.evaluations == 4
+
+    graph.set("b", 20)
+    assert graph.dirty() == {"d"}
+    assert graph["d"] == 24
+    assert graph.evaluations == 5
+    graph.set("b", 20)
+    assert not graph.dirty()
+
+    with pytest.raises(ValueError):
+        graph.set("d", 0)
+    with pytest.raises(KeyError):
+        _ = graph["e"]
+
+
+def test_color_graph():
+    """Test that changing the accent only recomputes colors derived from it."""
+    graph = get_color_graph(get_base_chromatic_palette())
+    compute_color_map(2)
+    evaluations = graph.evaluations
+    color_map = compute_color_map("#3074e2")
+    assert color_map["$accent$"] == "#3074e2"
+    # deepen, soften(deepen), dim and vividify of the accent, their aliases and
+    # the placeholders of the accent and the four derived colors
+    assert graph.evaluations - evaluations == 13
+    assert graph.export()["derived"]["deep_accent"] == {
+        "function": "identity", "inputs": ["deepen(accent)"]}
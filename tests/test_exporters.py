@@ -0,0 +1,26 @@
+"""Exporter tests."""
+
+from nightstorm.exporters import EXPORTERS, export_path, export_variants, load_export_template
+from nightstorm.generate_themes import VARIANTS, render_theme_variant
+
+
+def test_templates():
+    """Test that the exporter templates only use known placeholders."""
+    for name, exporter in EXPORTERS.items():
+        if name != "vscode":
+            assert not load_export_template(exporter.template).unknown_placeholders
+
+
+def test_export(tmp_path):
+    """Test exporting variants to all formats, sequentially and in threads."""
+    written = export_variants(VARIANTS[:2], tmp_path/"sequential")
+    assert len(written) == 2*len(EXPORTERS)
+    assert not export_variants(VARIANTS[:2], tmp_path/"sequential")
+    export_variants(VARIANTS[:2], tmp_path/"threaded", jobs=3)
+    for variant_name, accent_color in VARIANTS[:2]:
+        assert export_path("vscode", variant_name, tmp_path/"sequential").read_text() \
+            == render_theme_variant(accent_color, variant_name)
+        for name in EXPORTERS:
+            content = export_path(name, variant_name, tmp_path/"sequential").read_bytes()
+            assert b"$" not in content or name == "vscode"
+            assert export_path(name, variant_name, tmp_path/"threaded").read_bytes() == content
@@ -0,0 +1,78 @@
+"""Icon generation tests."""
+
+import argparse
+import sys
+import pytest
+import skia
+from nightstorm import generate_icon
+from nightstorm.generate_icon import (
+    encode_icon,
+    export_icon,
+    icon_filename,
+    pixel_size,
+    record_icon,
+)
+
+
+def test_icon_filename():
+    """Test that the canvas size keeps the plain name and other sizes are suffixed."""
+    assert icon_filename(256, "png") == "icon.png"
+    assert icon_filename(256, "webp") == "icon.webp"
+    assert icon_filename(64, "png") == "icon-64.png"
+    assert icon_filename(1024, "webp") == "icon-1024.webp"
+    assert icon_filename(64, "svg") == "icon.svg"
+
+
+def test_encode_icon():
+    """Test encoding the icon in several sizes and formats."""
+    encoded = encode_icon(record_icon(), sizes=(16, 256, 512), formats=("svg", "png", "webp"))
+    assert set(encoded) == {"icon.svg", "icon-16.png", "icon.png", "icon-512.png",
+                            "icon-16.webp", "icon.webp", "icon-512.webp"}
+    assert encoded["icon.svg"].lstrip().startswith(b"<?xml")
+    for name, data in encoded.items():
+        if name.endswith(".svg"):
+            continue
+        if name.endswith(".png"):
+            assert data.startswith(b"\x89PNG")
+        else:
+            assert data[:4] == b"RIFF" and data[8:12] == b"WEBP"
+        image = skia.Image.MakeFromEncoded(skia.Data.MakeWithCopy(data))
+        size = int(name.removesuffix(".png").removesuffix(".webp").partition("-")[2] or 256)
+        assert (image.width(), image.height()) == (size, size)
+
+
+def test_parallel_encoding():
+    """Test that encoding in processes matches the sequential output."""
+    picture = record_icon()
+    sizes, formats = (16, 48, 256), ("svg", "png", "webp")
+    assert encode_icon(picture, sizes, formats, jobs=2) == encode_icon(picture, sizes, formats)
+
+
+def test_default_export(tmp_path, monkeypatch):
+    """Test that a default run writes exactly icon.svg and icon.png."""
+    assert export_icon(tmp_path) == ["icon.svg", "icon.png"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["icon.png", "icon.svg"]
+    monkeypatch.setattr(sys, "argv", ["generate_icon", str(tmp_path/"main")])
+    generate_icon.main()
+    assert sorted(path.name for path in (tmp_path/"main").iterdir()) == ["icon.png", "icon.svg"]
+    assert (tmp_path/"main"/"icon.png").read_bytes() == (tmp_path/"icon.png").read_bytes()
+
+
+@pytest.mark.parametrize("formats", [("png",), ("webp",)])
+def test_export_sizes(tmp_path, formats):
+    """Test writing all standard sizes in one raster format."""
+    names = export_icon(tmp_path, generate_icon.SIZES, formats)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(names)
+    assert len(names) == len(generate_icon.SIZES)
+
+
+def test_pixel_size(tmp_path, monkeypatch):
+    """Test that non-positive sizes are usage errors."""
+    assert pixel_size("16") == 16
+    for invalid in ["0", "-16"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            pixel_size(invalid)
+    monkeypatch.setattr(sys, "argv", ["generate_icon", str(tmp_path), "--sizes", "0"])
+    with pytest.raises(SystemExit):
+        generate_icon.main()
+    assert not any(tmp_path.iterdir())
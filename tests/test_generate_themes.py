@@ -0,0 +1,130 @@
+"""Theme generation tests."""
+
+import argparse
+import sys
+import zipfile
+import pytest
+from nightstorm import bulk_export
+from nightstorm.bulk_export import hex_accents, hex_color, iter_themes, write_archive
+from nightstorm.generate_themes import (
+    VARIANTS,
+    compute_color_map,
+    generate_theme_variants,
+    get_color_graph,
+    get_base_chromatic_palette,
+    job_count,
+    load_template,
+    profiled,
+    render_theme_variant,
+)
+from nightstorm import generate_themes
+
+
+def test_parallel_generation(tmp_path):
+    """Test that parallel generation matches the sequential output."""
+    (tmp_path/"sequential").mkdir()
+    (tmp_path/"parallel").mkdir()
+    generate_theme_variants(VARIANTS, tmp_path/"sequential")
+    generate_theme_variants(VARIANTS, tmp_path/"parallel", jobs=2)
+    for variant_name, _ in VARIANTS:
+        name = f"Nightstorm-{variant_name}.json"
+        assert (tmp_path/"parallel"/name).read_bytes() == (tmp_path/"sequential"/name).read_bytes()
+
+
+def test_incremental_generation(tmp_path):
+    """Test that incremental builds only rewrite outdated variants."""
+    generate_theme_variants(VARIANTS, tmp_path, incremental=True)
+    paths = sorted(tmp_path.glob("Nightstorm-*.json"))
+    assert len(paths) == len(VARIANTS)
+    mtimes = [path.stat().st_mtime_ns for path in paths]
+
+    generate_theme_variants(VARIANTS, tmp_path, incremental=True)
+    assert [path.stat().st_mtime_ns for path in paths] == mtimes
+
+    content = paths[0].read_text()
+    paths[0].write_text("{}")
+    generate_theme_variants(VARIANTS, tmp_path, incremental=True)
+    assert paths[0].read_text() == content
+    assert [path.stat().st_mtime_ns for path in paths[1:]] == mtimes[1:]
+
+
+def test_bulk_export(tmp_path):
+    """Test exporting themes for hex accents into an archive."""
+    palette = get_base_chromatic_palette()
+    accents = list(hex_accents([palette[2], palette[10]]))
+    assert write_archive(iter_themes(accents), tmp_path/"themes.vsix") == 2
+    with zipfile.ZipFile(tmp_path/"themes.vsix") as archive:
+        for (variant_name, _), accent_color in zip(accents, (2, 10)):
+            content = archive.read(f"extension/themes/Nightstorm-{variant_name}.json")
+            assert content.decode() == render_theme_variant(accent_color, variant_name)
+
+
+def test_load_template():
+    """Test that loading the template knows every color without evaluating any."""
+    palette = get_base_chromatic_palette()
+    keys = compute_color_map(3).keys() | {"$variant$"}
+    load_template.cache_clear()
+    template = load_template()
+    assert not template.unknown_placeholders & keys
+    assert template.unused_keys <= keys
+    assert get_color_graph(palette)["accent"] == get_color_graph(palette)["03"]
+
+
+def test_hex_color(tmp_path, monkeypatch):
+    """Test parsing accent colors with and without the number sign."""
+    assert hex_color("#3074e2") == hex_color("3074E2") == "#3074e2"
+    for invalid in ["#fff", "3074e", "#3074e2ff", "#3074eg", "3074e2 "]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            hex_color(invalid)
+    monkeypatch.setattr(sys, "argv", ["bulk_export", str(tmp_path), "--hex", "3074e"])
+    with pytest.raises(SystemExit):
+        bulk_export.main()
+    monkeypatch.setattr(sys, "argv", ["bulk_export", str(tmp_path), "--hex", "3074e2"])
+    bulk_export.main()
+    assert (tmp_path/"Nightstorm-accent-3074e2.json").read_text() \
+        == render_theme_variant("#3074e2", "accent-3074e2")
+
+
+def test_job_count(tmp_path, monkeypatch):
+    """Test that negative job counts are usage errors."""
+    assert job_count("0") == 0
+    assert job_count("4") == 4
+    with pytest.raises(argparse.ArgumentTypeError):
+        job_count("-1")
+    monkeypatch.setattr(sys, "argv", ["generate_themes", str(tmp_path), "-j", "-1"])
+    with pytest.raises(SystemExit):
+        generate_themes.main()
+    assert not any(tmp_path.iterdir())
+
+
+def test_frange(tmp_path, monkeypatch):
+    """Test evenly spaced values and the rejection of non-positive steps."""
+    assert list(bulk_export.frange(0, 360, 90)) == [0, 90, 180, 270]
+    assert not list(bulk_export.frange(1, 0, 1))
+    for step in [0, -10]:
+        with pytest.raises(ValueError):
+            bulk_export.frange(0, 360, step)
+    monkeypatch.setattr(sys, "argv", ["bulk_export", str(tmp_path), "--hues", "0", "360", "0"])
+    with pytest.raises(SystemExit):
+        bulk_export.main()
+    assert not any(tmp_path.iterdir())
+
+
+def test_profiling(tmp_path):
+    """Test the per-variant profiling report."""
+    oklab_adjust = generate_themes.oklab_adjust
+    generate_themes.get_color_graph.cache_clear()
+    with profiled() as profile:
+        generate_theme_variants(VARIANTS[:2], tmp_path)
+    assert generate_themes.oklab_adjust is oklab_adjust
+
+    report = profile.report()
+    for variant_name, _ in VARIANTS[:2]:
+        record = report[variant_name]
+        assert set(record["stages"]) == {"color_map", "substitution", "write"}
+        assert record["calls"]["oklab_adjust"] > 0
+        path = tmp_path/f"Nightstorm-{variant_name}.json"
+        assert record["bytes_written"] == path.stat().st_size
+    # Only colors derived from the accent are recomputed for the second variant.
+    assert report[VARIANTS[0][0]]["calls"]["deopacify"] == 1
+    assert report[VARIANTS[1][0]]["calls"] == {"oklab_adjust": 4}
@@ -0,0 +1,36 @@
+"""Import time tests."""
+
+import subprocess
+import sys
+
+IMPORT_BUDGET_US = 200_000
+HEAVY_MODULES = {"numpy", "skia", "shapely", "matplotlib"}
+
+
+def import_times(module):
+    """Return the cumulative import time of each module imported by a module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_generate_themes_import_time():
+    """Test that importing generate_themes is cheap and free of heavy dependencies."""
+    times = import_times("nightstorm.generate_themes")
+    assert not HEAVY_MODULES & {name.partition(".")[0] for name in times}
+    assert times["nightstorm.generate_themes"] < IMPORT_BUDGET_US
+
+
+def test_plot_import_time():
+    """Test that importing plot defers matplotlib and numpy to plotting."""
+    times = import_times("nightstorm.plot")
+    assert not HEAVY_MODULES & {name.partition(".")[0] for name in times}
+    assert times["nightstorm.plot"] < IMPORT_BUDGET_US
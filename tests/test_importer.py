@@ -0,0 +1,63 @@
+"""Theme import tests."""
+
+import math
+import random
+from nightstorm import color_manipulation as cm
+from nightstorm.importer import ColorIndex, candidate_colors, import_themes
+
+
+def test_color_index():
+    """Test nearest color search against a linear scan."""
+    colors = candidate_colors()
+    index = ColorIndex(colors)
+    labs = [cm.linear_rgb_to_oklab(*cm.hex_to_linear_rgb(color)) for color in colors.values()]
+    random.seed(2)
+    queries = [cm.rgba_to_hex([random.random() for _ in range(3)]) for _ in range(200)]
+    indices, distances = index.query(queries)
+    for query, i, distance in zip(queries, indices, distances):
+        lab = cm.linear_rgb_to_oklab(*cm.hex_to_linear_rgb(query))
+        expected = min(math.dist(lab, candidate) for candidate in labs)
+        assert math.isclose(distance, expected, abs_tol=1e-12)
+        assert math.isclose(math.dist(lab, labs[i]), expected, abs_tol=1e-12)
+
+
+def test_import_themes(tmp_path):
+    """Test remapping the color literals of a theme, keeping alpha and comments."""
+    colors = candidate_colors()
+    theme = tmp_path/"theme.json"
+    theme.write_text('{\n    // comment "#123"\n    "colors": {\n'
+                     f'        "a": "{colors["deepen(03)"].upper()}",\n'
+                     '        "b": "#FFF8", /* "#123" */\n'
+                     '        /* "#123",\n'
+                     '        "#123" */ "c": "#20202180",\n'
+                     '        "d": "#20202180", "e": "url(#123)", "f": "a\\"#123"\n'
+                     '    },\n}\n')
+    report = import_themes([theme], tmp_path/"output")
+    assert (tmp_path/"output"/"theme.json").read_text() == (
+        '{\n    // comment "#123"\n    "colors": {\n'
+        f'        "a": "{colors["deepen(03)"]}",\n'
+        '        "b": "#ffffff88", /* "#123" */\n'
+        '        /* "#123",\n'
+        '        "#123" */ "c": "#20202080",\n'
+        '        "d": "#20202080", "e": "url(#123)", "f": "a\\"#123"\n'
+        '    },\n}\n')
+    entries = {entry["color"]: entry for entry in report["theme.json"]}
+    assert "#123" not in entries
+    assert entries["#20202180"]["count"] == 2
+    assert entries["#20202180"]["name"] == "editor_background"
+    assert entries[colors["deepen(03)"].upper()]["distance"] < 1e-12
+    distances = [entry["distance"] for entry in report["theme.json"]]
+    assert distances == sorted(distances, reverse=True)
+
+
+def test_import_name_collisions(tmp_path):
+    """Test that themes with the same file name are written side by side."""
+    paths = [tmp_path/"a"/"theme.json", tmp_path/"b"/"theme.json", tmp_path/"theme-2.json"]
+    for i, path in enumerate(paths):
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f'{{"colors": {{"a": "#{i}{i}{i}"}}}}\n')
+    report = import_themes(paths, tmp_path/"output")
+    assert list(report) == ["theme.json", "theme-2.json", "theme-2-2.json"]
+    for name, (entry,) in report.items():
+        assert f'"{entry["replacement"]}"' in (tmp_path/"output"/name).read_text()
+    assert [entry["color"] for (entry,) in report.values()] == ["#000", "#111", "#222"]
@@ -0,0 +1,49 @@
+"""Palette optimizer tests."""
+
+import numpy as np
+from nightstorm.color_manipulation import Color, oklab_adjust
+from nightstorm.generate_themes import ADJUSTMENTS, get_base_chromatic_palette
+from nightstorm.palette_optimizer import (
+    CURRENT,
+    chain_colors,
+    evaluate,
+    in_gamut,
+    optimize,
+    palettes,
+    process_pool,
+    transform_chains,
+)
+
+
+def test_current_palette():
+    """Test that the current parameters reproduce the base chromatic palette."""
+    assert tuple(palettes(CURRENT)[0]) == get_base_chromatic_palette()
+    assert in_gamut(CURRENT).all()
+    assert not in_gamut([1, 3, 0]).any()
+
+
+def test_chain_colors():
+    """Test that transform chains match the template colors (rounded once)."""
+    palette = get_base_chromatic_palette()
+    chains = transform_chains()
+    colors = chain_colors(palettes(CURRENT), chains)[0]
+    for chain, chain_palette in zip(chains, colors):
+        expected = []
+        for color in palette:
+            color = Color.from_hex(color)
+            for transform in chain:
+                color = oklab_adjust(color, *ADJUSTMENTS[transform])
+            expected.append(str(color))
+        assert list(chain_palette) == expected
+
+
+def test_optimize():
+    """Test that the search improves on the current palette."""
+    parameters, scores = optimize(count=64, rounds=1)
+    assert (scores[:-1] >= scores[1:]).all()
+    assert scores[0] >= evaluate([CURRENT], transform_chains())[0]
+    assert in_gamut(parameters[0]).all()
+    with process_pool(2) as executor:
+        assert np.array_equal(evaluate(parameters[:8], transform_chains(), executor=executor),
+                              scores[:8])
+    assert np.array_equal(optimize(count=64, rounds=1, jobs=2)[1], scores)
@@ -0,0 +1,16 @@
+"""Template compilation tests."""
+
+from nightstorm.templating import CompiledTemplate
+
+
+def test_compiled_template():
+    """Test rendering and placeholder reporting."""
+    template = CompiledTemplate(
+        '{"a": "$red$", "b": "$red$80", "$schema": "$blue$", "c": "$green$"}',
+        keys=["$red$", "$green$", "$cyan$"],
+    )
+    assert template.slots == {"$red$": [1, 3], "$green$": [5]}
+    assert template.unknown_placeholders == {"$blue$"}
+    assert template.unused_keys == {"$cyan$"}
+    assert template.render({"$red$": "#ff0000", "$green$": "#00ff00"}) == (
+        '{"a": "#ff0000", "b": "#ff000080", "$schema": "$blue$", "c": "#00ff00"}')
@@ -0,0 +1,59 @@
+"""Theme diff tests."""
+
+import math
+from nightstorm import color_manipulation as cm
+from nightstorm.theme_diff import diff, format_report, theme_entries
+
+
+def test_theme_entries():
+    """Test aligning theme entries by key, scope and selector."""
+    theme = {
+        "colors": {"editor.background": "#202020", "editor.foreground": "#BBB"},
+        "tokenColors": [
+            {"scope": ["comment", "string"], "settings": {"foreground": "#808080"}},
+            {"scope": "keyword", "settings": {"fontStyle": "bold"}},
+        ],
+        "semanticTokenColors": {"variable": {"foreground": "#ffffff80"}, "type": "#00ff00"},
+    }
+    assert theme_entries(theme) == {
+        "editor.background": "#202020",
+        "editor.foreground": "#bbbbbb",
+        "tokenColors[comment].foreground": "#808080",
+        "tokenColors[string].foreground": "#808080",
+        "semanticTokenColors[variable]": "#ffffff80",
+        "semanticTokenColors[type]": "#00ff00",
+    }
+
+
+def test_diff():
+    """Test the sorted, thresholded changes between two builds."""
+    old = {"a": {"colors": {"editor.background": "#000000", "x": "#ff0000", "y": "#808080",
+                            "z": "#ffffff80", "removed": "#123456"}}}
+    new = {"a": {"colors": {"editor.background": "#000000", "x": "#fe0000", "y": "#ffffff",
+                            "z": "#ffffff", "added": "#123456"}}}
+    changes = diff(old, new)["a"]
+    assert [entry["key"] for entry in changes] == ["y", "z", "x", "removed", "added"]
+    white = cm.linear_rgb_to_oklab(*cm.hex_to_linear_rgb("#ffffff"))
+    gray = cm.linear_rgb_to_oklab(*cm.hex_to_linear_rgb("#808080"))
+    assert math.isclose(changes[0]["distance"], math.dist(white, gray))
+    # Translucent white over black is drawn as #808080.
+    assert math.isclose(changes[1]["distance"], changes[0]["distance"])
+    assert [entry["key"] for entry in diff(old, new, threshold=0.01)["a"]] \
+        == ["y", "z", "removed", "added"]
+    assert diff(old, old) == {"a": []}
+
+
+def test_diff_invalid_colors():
+    """Test that malformed colors are reported without stopping the diff."""
+    old = {"a": {"colors": {"x": "#ff0000", "y": "#808080", "z": "#fff"}},
+           "b": {"colors": {"editor.background": "#202020", "x": "#ff0000"}}}
+    new = {"a": {"colors": {"x": "#ff000", "y": "#ffffff", "z": "#FFFFFF"}},
+           "b": {"colors": {"editor.background": "#20202", "x": "#00ff00"}}}
+    changes = diff(old, new)
+    assert [entry["key"] for entry in changes["a"]] == ["y", "x"]
+    assert changes["a"][0]["distance"] > 0
+    assert changes["a"][1]["distance"] is None
+    assert "#ff000" in changes["a"][1]["error"]
+    # A malformed background leaves the colors drawn over it unmeasured.
+    assert all("#20202" in entry["error"] for entry in changes["b"])
+    assert "#ff000" in format_report(changes)
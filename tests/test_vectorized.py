@@ -0,0 +1,113 @@
+"""Vectorized color manipulation tests."""
+
+import random
+import numpy as np
+import pytest
+from nightstorm import color_manipulation as cm
+from nightstorm import vectorized
+
+
+@pytest.fixture(name="hex_colors")
+def fixture_hex_colors():
+    """Return random colors in hex notation."""
+    random.seed(1)
+    return [cm.rgba_to_hex([random.random() for _ in range(3)]) for _ in range(5000)]
+
+
+def test_hex_parsing(hex_colors):
+    """Test hex parsing and formatting against the scalar functions."""
+    colors = hex_colors + ["#12345678", "#ABCDEF"]
+    packed = vectorized.hex_to_packed(colors)
+    assert packed[-2] == 0x12345678
+    assert list(vectorized.packed_to_hex(packed[:-2], alpha=False)) == hex_colors
+    assert np.array_equal(vectorized.hex_to_rgba(colors),
+                          [cm.hex_to_rgba(color) for color in colors])
+    assert vectorized.rgba_to_hex([0.2, 0.3, 1, 0.5]) == cm.rgba_to_hex([0.2, 0.3, 1, 0.5])
+    assert vectorized.hex_to_linear_rgb(colors[:-2]).tolist() \
+        == [list(cm.hex_to_linear_rgb(color)) for color in colors[:-2]]
+    for invalid in ["#abc", "#abcdef0", "#abcdef012", "abcdefff", "#abcdeg"]:
+        with pytest.raises(ValueError):
+            vectorized.hex_to_packed([invalid])
+
+
+def test_empty():
+    """Test that empty batches give empty results."""
+    assert vectorized.hex_to_packed([]).shape == (0,)
+    assert vectorized.hex_to_rgba([]).shape == (0, 4)
+    assert vectorized.hex_to_lch([]).shape == (0, 3)
+    assert vectorized.lch_to_hex(np.empty((0, 3))).shape == (0,)
+    assert vectorized.rgba_to_hex([]).shape == (0,)
+    assert vectorized.oklab_adjust([], 1.1).shape == (0,)
+    assert vectorized.deopacify([], [], []).alphas.shape == (0,)
+
+
+def test_conversions(hex_colors):
+    """Test that batch conversions agree with the scalar ones after quantization."""
+    lch = vectorized.hex_to_lch(hex_colors)
+    assert np.allclose(lch, [cm.hex_to_lch(color) for color in hex_colors], rtol=0, atol=1e-12)
+    assert list(vectorized.lch_to_hex(lch)) == hex_colors
+
+
+@pytest.mark.parametrize("factors", [(1, 1, 1.3), (0.85, 1.9, 0), (1.1, 2.5, 0), (0.6, 0.7, 0)])
+@pytest.mark.parametrize("gamut_mapping", ["clip", "chroma"])
+def test_oklab_adjust(hex_colors, factors, gamut_mapping):
+    """Test batch Oklab adjustments against the scalar function."""
+    assert list(vectorized.oklab_adjust(hex_colors, *factors, gamut_mapping)) == [
+        cm.oklab_adjust(color, *factors, gamut_mapping) for color in hex_colors]
+
+
+@pytest.mark.parametrize("mode", ["oklab", "linear rgb", "srgb", "srgb 2.2"])
+@pytest.mark.parametrize("alpha_mode", ["mix", "blend"])
+def test_mix(hex_colors, mode, alpha_mode):
+    """Test batch mixing against the scalar function."""
+    colors1 = [cm.hex_to_rgba(color) for color in hex_colors[::2]]
+    colors2 = [cm.hex_to_rgba(color)[:3] + [0.5] for color in hex_colors[1::2]]
+    expected = [cm.rgba_to_hex(cm.mix(c1, c2, 0.3, mode, alpha_mode))
+                for c1, c2 in zip(colors1, colors2)]
+    result = vectorized.rgba_to_hex(vectorized.mix(colors1, colors2, 0.3, mode, alpha_mode))
+    assert list(result) == expected
+
+
+@pytest.mark.parametrize("mode", ["oklab", "linear rgb", "srgb", "srgb 2.2"])
+@pytest.mark.parametrize("alpha_mode", ["mix", "blend"])
+def test_mixer(hex_colors, mode, alpha_mode):
+    """Test precompiled mixing against the scalar function."""
+    stop1, stop2 = hex_colors[0], hex_colors[1] + "80"
+    mixer = vectorized.Mixer([stop1, stop2], mode, alpha_mode)
+    t = np.linspace(0, 1, 101)
+    expected = [cm.rgba_to_hex(cm.mix(cm.hex_to_rgba(stop1), cm.hex_to_rgba(stop2), t_i, mode,
+                                      alpha_mode)) for t_i in t.tolist()]
+    assert mixer.hex(t) == expected
+
+
+def test_mixer_stops(hex_colors):
+    """Test that multi-stop mixing passes through the stops at their positions."""
+    stops = hex_colors[:4]
+    assert vectorized.Mixer(stops).hex([0, 1/3, 2/3, 1], alpha=False) == stops
+    mixer = vectorized.Mixer(stops, "srgb", positions=[0, 0.1, 0.2, 1])
+    assert mixer.hex([-1, 0.1, 0.2, 2], alpha=False) == [stops[0], *stops[1:3], stops[3]]
+    assert len(mixer.ramp(7)) == 7
+    with pytest.raises(ValueError):
+        vectorized.Mixer(stops, positions=[0, 0.5, 0.4, 1])
+
+
+def test_deopacify():
+    """Test batch alpha solving against the scalar function."""
+    colors, backgrounds, targets = zip(
+        ("#ffffff", "#2c2c2c", "#a0a0a0"),
+        ("#07454a", "#e068d8", "#745791"),
+        ("#000000", "#ffffff", "#808080"),
+        ("#ff0000", "#00ff00", "#804000"),  # unachievable
+        ("#ffffff", "#ffffff", "#000000"),  # unachievable
+    )
+    overlays = vectorized.deopacify(colors, backgrounds, targets)
+    for i in range(3):
+        expected = cm.hex_to_rgba(cm.deopacify(colors[i], backgrounds[i], targets[i]))[3]
+        assert abs(overlays.alphas[i] - expected) <= 2/255
+        assert overlays.residuals[i] < 0.01
+    assert (overlays.residuals[3:] > 0.05).all()
+
+    candidates = ["#000000", "#ffffff", "#07454a"]
+    overlays = vectorized.deopacify_search(candidates, backgrounds[:3], targets[:3])
+    assert list(overlays.indices) == [1, 2, 0]
+    assert (overlays.residuals < 0.01).all()
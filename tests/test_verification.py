@@ -0,0 +1,24 @@
+"""Exhaustive conversion verification tests."""
+
+import os
+import pytest
+from nightstorm.verification import COLOR_COUNT, verify
+
+
+def test_verify():
+    """Test that colors round-trip, sequentially and in processes."""
+    result = verify(stop=1 << 16, chunk_size=1 << 14)
+    assert result.count == 1 << 16
+    assert not result.failures
+    assert 0 < result.max_oklab_error < 1e-6
+    assert verify(stop=1 << 16, chunk_size=1 << 14, jobs=2) == result
+
+
+@pytest.mark.skipif(not os.environ.get("NIGHTSTORM_SLOW_TESTS"),
+                    reason="set NIGHTSTORM_SLOW_TESTS=1 to verify all colors")
+def test_verify_all():
+    """Test that all 8-bit sRGB colors round-trip."""
+    result = verify(jobs=os.cpu_count())
+    assert result.count == COLOR_COUNT
+    assert not result.failures
+    assert result.max_oklab_error < 1e-6
@@ -0,0 +1,27 @@
+"""Watch mode tests."""
+
+from nightstorm.generate_themes import VARIANTS
+from nightstorm.watch import MODULES, TEMPLATE, Watcher, watched_paths
+
+
+def test_watch_rebuild(tmp_path):
+    """Test that watch mode re-renders on any change but only rewrites changed files."""
+    watcher = Watcher(tmp_path, VARIANTS)
+    assert watcher.rebuild() == [variant_name for variant_name, _ in VARIANTS]
+    assert not watcher.rebuild()
+    path = tmp_path/f"Nightstorm-{VARIANTS[0][0]}.json"
+    content = path.read_text()
+    path.write_text("{}")
+    assert watcher.rebuild({TEMPLATE}) == [VARIANTS[0][0]]
+    assert path.read_text() == content
+    path.write_text("{}")
+    assert watcher.rebuild({"templating.py"}) == [VARIANTS[0][0]]
+    assert path.read_text() == content
+    assert watcher.poll() == set()
+
+
+def test_watched_modules():
+    """Test that every generator module is watched and reloaded before its dependents."""
+    assert MODULES.index("profiling") == 0
+    assert MODULES.index("derivation") < MODULES.index("generate_themes")
+    assert all(path.exists() for path in watched_paths().values())